@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+
+class MemoryFrameCache:
+    """LRU cache of DataFrames bounded by their total in-memory size."""
+
+    def __init__(self, max_bytes: int) -> None:
+
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+
+        with self._lock:
+            if key not in self._frames:
+                self.stats["misses"] += 1
+                return None
+            self._frames.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._frames[key][0]
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._frames:
+                self.bytes -= self._frames.pop(key)[1]
+            self._frames[key] = (df, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._frames.popitem(last=False)
+                self.bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def discard(self, prefix: str, keep: str) -> None:
+        """Drop the entries whose key starts with prefix but not with keep."""
+
+        with self._lock:
+            for key in list(self._frames):
+                if key.startswith(prefix) and not key.startswith(keep):
+                    self.bytes -= self._frames.pop(key)[1]
+                    self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._frames.clear()
+            self.bytes = 0
+
+
+def _restore_object_columns(df: pd.DataFrame, schema: pa.Schema) -> pd.DataFrame:
+    """Turn columns stored from object dtype back into object, missing as None.
+
+    Other dtypes, extension ones included, are restored by Arrow from the
+    pandas metadata; object strings would come back as the str dtype.
+    """
+    for column in (schema.pandas_metadata or {}).get("columns", []):
+        name = column["name"]
+        if (
+            column["numpy_type"] == "object"
+            and name in df.columns
+            and df[name].dtype != object
+        ):
+            df[name] = df[name].astype(object).where(df[name].notna(), None)
+    return df
+
+
+class DiskFrameCache:
+    """DataFrames stored as Feather files under a directory, one per key.
+
+    A file's access time is bumped on every hit, so when ``max_bytes`` is
+    set the least recently used ones are evicted first. Its modification
+    time stays the write time, against which ``ttl`` (seconds) is checked.
+    Frames come back with the dtypes they were stored with.
+    """
+
+    extension = ".feather"
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+    ) -> None:
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.extension)
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.stats["misses"] += 1
+            return None
+
+        now = time.time()
+        modified = os.stat(path).st_mtime
+        if self.ttl is not None and now - modified > self.ttl:
+            os.remove(path)
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        table = feather.read_table(path)
+        df = _restore_object_columns(table.to_pandas(), table.schema)
+        os.utime(path, (now, modified))
+        self.stats["hits"] += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        # unique per thread, steps run concurrently by PipelineDAG may put
+        # the same key
+        tmp_path = "{}.{}.{}.tmp".format(path, os.getpid(), threading.get_ident())
+        try:
+            df.to_feather(tmp_path)
+        except (ValueError, TypeError, NotImplementedError) as e:
+            # e.g. mixed-type object columns or a non-default index
+            logging.warning("Frame not cached on disk: {}".format(e))
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        os.replace(tmp_path, path)
+
+        if self.max_bytes is not None:
+            self._evict()
+
+    def _evict(self) -> None:
+
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(self.extension):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    entries.append((stat.st_atime, stat.st_size, name))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, name in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.directory, name))
+                total -= size
+                self.stats["evictions"] += 1
+
+    def discard(self, prefix: str, keep: str) -> None:
+        """Remove the entries whose key starts with prefix but not with keep."""
+
+        with self._lock:
+            if not os.path.isdir(self.directory):
+                return
+            for name in os.listdir(self.directory):
+                if (
+                    name.endswith(self.extension)
+                    and name.startswith(prefix)
+                    and not name.startswith(keep)
+                ):
+                    os.remove(os.path.join(self.directory, name))
+                    self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+
+        with self._lock:
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if name.endswith(self.extension):
+                        os.remove(os.path.join(self.directory, name))
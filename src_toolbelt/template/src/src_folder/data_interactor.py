@@ -1,13 +1,36 @@
+import asyncio
+import functools
+import hashlib
+import io
+import logging
 import os
+import queue
+import re
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
 
 import pandas as pd
 import pandas_gbq
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import yaml
+from google.cloud import bigquery, bigquery_storage
 
 from $PROJECT_NAME$ import get_data_path, get_queries_path
+from $PROJECT_NAME$.cache import DiskFrameCache, MemoryFrameCache
 from $PROJECT_NAME$.config import Config
+from $PROJECT_NAME$.schema import (
+    apply_schema,
+    frame_memory,
+    infer_schema,
+    read_schema,
+    write_schema,
+)
 
 
 class StaticDataInteractor(ABC):
@@ -46,49 +69,750 @@ class WarehouseDataInteractor(ABC):
         )
 
 
+class AsyncWarehouseDataInteractor(ABC):
+    """Abstract class to interact with a data warehouse from asyncio code."""
+
+    @abstractmethod
+    async def run_str_query(
+        self, query: str, timeout: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Runs an SQL query on the database and returns the result as a pandas DataFrame.
+
+        Args:
+            query (str): The SQL query to be executed.
+            timeout (float): Seconds before the query is cancelled and
+                asyncio.TimeoutError raised.
+
+        Returns:
+            pd.DataFrame: The result of the query execution as a DataFrame.
+        """
+        raise NotImplementedError(
+            "AsyncWarehouseDataInteractor subclass must implement run_str_query method"
+        )
+
+    async def run_queries(
+        self,
+        queries: Iterable[str],
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+    ) -> List[pd.DataFrame]:
+        """Runs the queries concurrently, returning their results in order."""
+        return await asyncio.gather(
+            *(self.run_str_query(query, timeout=timeout) for query in queries),
+            return_exceptions=return_exceptions,
+        )
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("{} is read-only".format(type(self).__name__))
+
+
+class FrozenDict(dict):
+    """dict that refuses in-place changes; ``copy()`` returns a plain dict."""
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FrozenList(list):
+    """list that refuses in-place changes; ``copy()`` returns a plain list."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+def freeze(data):
+    """Recursively turn dicts and lists into their read-only variants."""
+    if isinstance(data, dict):
+        return FrozenDict((key, freeze(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return FrozenList(freeze(value) for value in data)
+    return data
+
+
+def thaw(data):
+    """Recursively turn read-only dicts and lists back into plain ones."""
+    if isinstance(data, dict):
+        return {key: thaw(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [thaw(value) for value in data]
+    return data
+
+
 class YAMLDataInteractor(StaticDataInteractor):
+    """Process-wide registry of the YAML params files.
+
+    Each file is parsed once (with libyaml's CSafeLoader when available)
+    and kept until its mtime changes. Loaded params are frozen, so the
+    same objects can be handed to every step without copying; use
+    ``thaw`` for a mutable copy.
+    """
+
+    _lock = threading.Lock()
+    _loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
     def __new__(cls, *args, **kwargs):
         """Create a new instance of the class if it doesn't exist."""
-        if not hasattr(cls, "_instance"):
-            cls._instance = super(YAMLDataInteractor, cls).__new__(cls)
+        with cls._lock:
+            if not hasattr(cls, "_instance"):
+                instance = super(YAMLDataInteractor, cls).__new__(cls)
+                instance.params = {}
+                instance._files = {}
+                cls._instance = instance
         return cls._instance
 
+    def _read(self, full_path: str):
+        mtime = os.stat(full_path).st_mtime_ns
+        cached = self._files.get(full_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(full_path, "r") as f:
+            params = freeze(yaml.load(f, Loader=self._loader))
+        self._files[full_path] = (mtime, params)
+        return params
+
     def load(self, name, path):
-        with open(get_data_path(path), "r") as f:
-            params = yaml.load(f, Loader=yaml.FullLoader)
+        with self._lock:
+            params = self._read(get_data_path(path))
             self.params[name] = params
         return params
 
     def write(self, data, path):
         with open(get_data_path(path), "w") as f:
-            yaml.dump(data, f)
+            yaml.dump(thaw(data), f)
+
+
+_READERS = {
+    ".csv": pd.read_csv,
+    ".parquet": pd.read_parquet,
+    ".feather": pd.read_feather,
+    ".arrow": pd.read_feather,
+}
+
+_WRITERS = {
+    ".csv": ("to_csv", {"index": False, "encoding": "utf-8"}),
+    ".parquet": ("to_parquet", {"index": False}),
+    ".feather": ("to_feather", {}),
+    ".arrow": ("to_feather", {}),
+}
+
+
+def _is_interval(dtype) -> bool:
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return isinstance(dtype, pd.IntervalDtype)
+
+
+def _intervals_to_str(df: pd.DataFrame) -> pd.DataFrame:
+    """Intervals (e.g. Binner outputs) as the text CSV would hold.
+
+    Parquet and Feather can't store them, categories are kept.
+    """
+    columns = [column for column, dtype in df.dtypes.items() if _is_interval(dtype)]
+    if not columns:
+        return df
+    df = df.copy(deep=False)
+    for column in columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            df[column] = values.cat.rename_categories(
+                values.cat.categories.astype(str)
+            )
+        else:
+            df[column] = values.astype(str).where(values.notna())
+    return df
+
+
+# specs reading only some of the rows
+_ROW_SPECS = ("nrows", "skiprows", "skipfooter", "filters")
+
+
+def _file_format(path: str, lookup: dict) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in lookup.keys():
+        raise KeyError(
+            "File format {} invalid or not implemented. The available formats are: {}".format(
+                extension, ", ".join(lookup.keys())
+            )
+        )
+    return extension
 
 
 class CSVDataInteractor(StaticDataInteractor):
+    """Reads and writes tabular files, with the format picked by extension.
 
-    def __init__(self, base_path=get_data_path("")):
-        self.cache_dict = {}
+    CSV goes through pandas' parser; Parquet and Feather/Arrow IPC are read
+    with pyarrow, so ``specs`` can carry ``columns`` (projection) and, for
+    Parquet, ``filters`` (row group predicate pushdown). ``columns`` passed
+    to load is mapped to the projection spec of the file's format.
+
+    Loaded frames are cached in memory (LRU bounded by bytes) and parsed
+    CSVs also on disk as Feather, keyed on the file's path, mtime and size
+    plus the specs, so a changed file is parsed again and an unchanged one
+    is never parsed twice, even across restarts. Parsing a changed file
+    drops the entries of its previous versions, and the disk tier is kept
+    under ``disk_cache_bytes``.
+    """
+
+    def __init__(
+        self,
+        base_path=get_data_path(""),
+        memory_cache_bytes: int = 2 * 1024**3,
+        disk_cache_dir: Optional[str] = get_data_path("interim/.cache"),
+        disk_cache_bytes: Optional[int] = 10 * 1024**3,
+    ):
         self.base_path = base_path
+        self.memory_cache = MemoryFrameCache(max_bytes=memory_cache_bytes)
+        self.disk_cache = (
+            DiskFrameCache(directory=disk_cache_dir, max_bytes=disk_cache_bytes)
+            if disk_cache_dir is not None
+            else None
+        )
+
+    @staticmethod
+    def _cache_key(full_path: str, specs: dict) -> str:
+        """Digests of the real path, of mtime and size and of the specs.
+
+        Joined as "<file>-<version>-<specs>", so the entries of every
+        version of a file share the same prefix.
+        """
+        stat = os.stat(full_path)
+        return "-".join(
+            hashlib.blake2b(content.encode("utf-8"), digest_size=8).hexdigest()
+            for content in [
+                os.path.realpath(full_path),
+                "{}|{}".format(stat.st_mtime_ns, stat.st_size),
+                repr(sorted(specs.items(), key=lambda item: item[0])),
+            ]
+        )
+
+    @property
+    def cache_stats(self) -> dict:
+        return {
+            "memory": dict(self.memory_cache.stats),
+            "disk": dict(self.disk_cache.stats) if self.disk_cache else {},
+        }
+
+    def read_columns(self, path, specs={}) -> List[str]:
+        """Column names of a file, read from its header or schema only."""
+        extension = _file_format(path, _READERS)
+        full_path = os.path.join(self.base_path, path)
+        if extension == ".csv":
+            return list(pd.read_csv(full_path, **{**specs, "nrows": 0}).columns)
+        return ds.dataset(
+            full_path, format="parquet" if extension == ".parquet" else "ipc"
+        ).schema.names
+
+    @staticmethod
+    def _projected_specs(extension: str, specs: dict, columns) -> dict:
+        if columns is None:
+            return specs
+        return {**specs, ("usecols" if extension == ".csv" else "columns"): columns}
+
+    def _compact(self, df, full_path, date_columns, partial) -> pd.DataFrame:
+        schema = read_schema(full_path)
+        date_columns = [column for column in date_columns if column in df.columns]
+        missing = [column for column in df.columns if column not in schema]
+        changed = bool(missing) or any(
+            schema.get(c) != "datetime64[ns]" for c in date_columns
+        )
+        schema.update(infer_schema(df[missing], date_columns=date_columns))
+        schema.update({column: "datetime64[ns]" for column in date_columns})
+
+        before = frame_memory(df)
+        skipped = apply_schema(df, schema)
+        if skipped:
+            # the saved dtypes can't hold these rows, widened to ones that can
+            schema.update(infer_schema(df[skipped]))
+            apply_schema(df, {column: schema[column] for column in skipped})
+            changed = True
+        # dtypes inferred from some of the rows only are not saved
+        if changed and not partial:
+            write_schema(full_path, schema)
+        print(
+            "Dtypes compacted: {:.1f} MB -> {:.1f} MB".format(
+                before / 1024**2, frame_memory(df) / 1024**2
+            )
+        )
+        return df
+
+    def load(
+        self,
+        path,
+        specs={},
+        refresh=False,
+        columns=None,
+        compact=False,
+        date_columns=(),
+    ):
+        """Load a file, from the caches when possible.
+
+        With ``compact`` the frame is shrunk to the schema saved next to the
+        file (see ``schema.infer_schema``), inferred and saved first for
+        columns it doesn't cover; ``date_columns`` are parsed as datetimes.
+        Saved dtypes that would change a loaded value are widened instead.
+        Reads of some of the rows (e.g. ``nrows``) don't save the schema.
+        """
+        extension = _file_format(path, _READERS)
+        full_path = os.path.join(self.base_path, path)
+        specs = self._projected_specs(extension, specs, columns)
+        cache_id = self._cache_key(
+            full_path,
+            {**specs, "compact": (tuple(date_columns),)} if compact else specs,
+        )
+        use_disk_cache = self.disk_cache is not None and extension == ".csv"
+
+        if not refresh:
+            df = self.memory_cache.get(cache_id)
+            if df is None and use_disk_cache:
+                df = self.disk_cache.get(cache_id)
+                if df is not None:
+                    self.memory_cache.put(cache_id, df)
+            if df is not None:
+                return df
+
+        df = _READERS[extension](full_path, **specs)
+        if compact:
+            df = self._compact(
+                df,
+                full_path,
+                date_columns,
+                partial=any(spec in specs for spec in _ROW_SPECS),
+            )
+
+        # frames of a previous version of the file can't be hit anymore
+        file_id, version, _ = cache_id.split("-")
+        stale = (file_id + "-", "{}-{}-".format(file_id, version))
+        self.memory_cache.discard(*stale)
+        self.memory_cache.put(cache_id, df)
+        if use_disk_cache:
+            self.disk_cache.discard(*stale)
+            self.disk_cache.put(cache_id, df)
+        print("File {} loaded successfully".format(path))
+        return df
+
+    def write(self, df, path, specs=None):
+        extension = _file_format(path, _WRITERS)
+        writer, default_specs = _WRITERS[extension]
+        specs = default_specs if specs is None else specs
+        if extension != ".csv":
+            df = _intervals_to_str(df)
+        getattr(df, writer)(os.path.join(self.base_path, path), **specs)
+        print("File {} written successfully".format(path))
+
+    def iter_load(
+        self, path, specs={}, chunksize: int = 100_000, columns=None
+    ) -> Iterator[pd.DataFrame]:
+        """Yield the file in chunks of at most ``chunksize`` rows, uncached."""
+        extension = _file_format(path, _READERS)
+        full_path = os.path.join(self.base_path, path)
+        specs = self._projected_specs(extension, specs, columns)
+
+        if extension == ".csv":
+            with pd.read_csv(full_path, chunksize=chunksize, **specs) as reader:
+                yield from reader
+            return
+
+        dataset = ds.dataset(
+            full_path, format="parquet" if extension == ".parquet" else "ipc"
+        )
+        filters = specs.get("filters")
+        for batch in dataset.to_batches(
+            columns=specs.get("columns"),
+            filter=pq.filters_to_expression(filters) if filters else None,
+            batch_size=chunksize,
+        ):
+            yield batch.to_pandas()
+
+    @staticmethod
+    def _arrow_writer(extension: str, full_path: str, schema: pa.Schema):
+        if extension == ".parquet":
+            return pq.ParquetWriter(full_path, schema)
+        return pa.ipc.new_file(full_path, schema)
+
+    def _rewrite_arrow_file(self, extension: str, full_path: str, schema: pa.Schema):
+        """Cast what was written so far to schema, returning the new writer."""
+        tmp_path = "{}.{}.tmp".format(full_path, os.getpid())
+        os.replace(full_path, tmp_path)
+        writer = self._arrow_writer(extension, full_path, schema)
+        try:
+            dataset = ds.dataset(
+                tmp_path, format="parquet" if extension == ".parquet" else "ipc"
+            )
+            for batch in dataset.to_batches():
+                writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+        except BaseException:
+            writer.close()
+            raise
+        finally:
+            os.remove(tmp_path)
+        return writer
+
+    def write_chunks(self, chunks: Iterable[pd.DataFrame], path, specs=None) -> int:
+        """Write chunks to one file as they come, returning the number of rows.
+
+        Parquet and Feather files take the schema of the first chunk. A
+        later chunk that doesn't fit it (e.g. strings in a column that was
+        all null so far, or floats after integers) widens the schema, and
+        the rows already written are rewritten to it.
+        """
+        extension = _file_format(path, _WRITERS)
+        full_path = os.path.join(self.base_path, path)
+        specs = dict(_WRITERS[extension][1] if specs is None else specs)
+
+        n_rows = 0
+        writer, schema = None, None
+        # columns with a value so far; the others may take any type
+        typed = set()
+        try:
+            for chunk in chunks:
+                if extension == ".csv":
+                    chunk.to_csv(
+                        full_path,
+                        mode="w" if n_rows == 0 else "a",
+                        header=n_rows == 0,
+                        **specs,
+                    )
+                else:
+                    table = pa.Table.from_pandas(
+                        _intervals_to_str(chunk),
+                        preserve_index=specs.get("index", False),
+                    )
+                    if writer is None:
+                        schema = table.schema
+                        writer = self._arrow_writer(extension, full_path, schema)
+                    elif not table.schema.equals(schema):
+                        try:
+                            table = table.cast(schema)
+                        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                            known = pa.schema(
+                                [
+                                    field
+                                    if field.name in typed
+                                    else field.with_type(pa.null())
+                                    for field in schema
+                                ]
+                            )
+                            schema = pa.unify_schemas(
+                                [table.schema, known], promote_options="permissive"
+                            )
+                            writer, previous = None, writer
+                            previous.close()
+                            writer = self._rewrite_arrow_file(
+                                extension, full_path, schema
+                            )
+                            table = table.cast(schema)
+                    writer.write_table(table)
+                    typed.update(
+                        name
+                        for name, column in zip(table.column_names, table.columns)
+                        if column.null_count < len(column)
+                    )
+                n_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
 
-    def load(self, path, specs={}, refresh=False):
-        cache_id = path + str(specs)
-        if cache_id in self.cache_dict.keys() and not refresh:
-            return self.cache_dict[cache_id]
-        else:
-            if path.endswith(".csv"):
-                df = pd.read_csv(os.path.join(self.base_path, path), **specs)
-            self.cache_dict[cache_id] = df
-            print("File {} loaded successfully".format(path))
-            return df
-
-    def write(self, df, path, specs={"index": False, "encoding": "utf-8"}):
-        if path.endswith(".csv"):
-            df.to_csv(os.path.join(self.base_path, path), **specs)
         print("File {} written successfully".format(path))
+        return n_rows
+
+
+_STREAM_DONE = object()
+
+_WRITE_DISPOSITIONS = {
+    "fail": "WRITE_EMPTY",
+    "replace": "WRITE_TRUNCATE",
+    "append": "WRITE_APPEND",
+}
+
+
+def _bigquery_type(arrow_type: pa.DataType) -> str:
+    """BigQuery type of a flat Arrow column, as a Parquet load infers it."""
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+    for check, bigquery_type in (
+        (pa.types.is_boolean, "BOOLEAN"),
+        (pa.types.is_integer, "INTEGER"),
+        (pa.types.is_floating, "FLOAT"),
+        (pa.types.is_decimal, "NUMERIC"),
+        (pa.types.is_string, "STRING"),
+        (pa.types.is_large_string, "STRING"),
+        (pa.types.is_null, "STRING"),
+        (pa.types.is_binary, "BYTES"),
+        (pa.types.is_date, "DATE"),
+        (pa.types.is_time, "TIME"),
+    ):
+        if check(arrow_type):
+            return bigquery_type
+    if pa.types.is_timestamp(arrow_type):
+        return "DATETIME" if arrow_type.tz is None else "TIMESTAMP"
+    raise ValueError(
+        "No BigQuery type for Arrow type {}, give it in table_schema".format(
+            arrow_type
+        )
+    )
+
+
+def merge_table_schema(schema: pa.Schema, table_schema: list) -> list:
+    """Load schema of the frame's columns, as pandas_gbq builds it.
+
+    Fields of ``table_schema`` (pandas_gbq's format) override the types
+    inferred from the Arrow schema for the columns they name; the others
+    keep the inferred ones.
+    """
+    given = {field["name"]: field for field in table_schema}
+    return [
+        bigquery.SchemaField.from_api_repr(given[field.name])
+        if field.name in given
+        else bigquery.SchemaField(field.name, _bigquery_type(field.type))
+        for field in schema
+    ]
+
+
+_SQL_TOKENS = re.compile(
+    r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)"""
+    r"|(?:\s|--[^\n]*|#[^\n]*|/\*.*?\*/)+",
+    re.DOTALL,
+)
+
+
+def normalize_query(query: str) -> str:
+    """Drop comments and collapse whitespace outside of quoted literals."""
+
+    def replace(match):
+        literal = match.group(1)
+        return literal if literal is not None else " "
+
+    return _SQL_TOKENS.sub(replace, query).strip().rstrip(";").strip()
+
 
+# literals and quoted names stay whole, so their contents never match
+_SQL_WORDS = re.compile(
+    r"""'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`|\w+|[()]""", re.DOTALL
+)
 
-class BigQueryDataInteractor(WarehouseDataInteractor):
+
+def has_top_level_order_by(query: str) -> bool:
+    """Whether the outermost statement of the query sorts its result.
+
+    ORDER BY inside parentheses (subqueries, window functions) doesn't count.
+    """
+    depth, previous = 0, None
+    for token in _SQL_WORDS.findall(normalize_query(query)):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and previous == "ORDER" and token.upper() == "BY":
+            return True
+        previous = token.upper() if depth == 0 else None
+    return False
+
+
+class _BigQueryClient:
+    """Project and ``bigquery.Client``, created on first use unless given."""
+
+    def __init__(self, client=None, project_id: Optional[str] = None):
+        self._client = client
+        self._project_id = project_id
+
+    @property
+    def project_id(self) -> str:
+        if self._project_id is None:
+            self._project_id = Config().GCP_PROJECT
+        return self._project_id
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = bigquery.Client(project=self.project_id)
+        return self._client
+
+
+class BigQueryDataInteractor(_BigQueryClient, WarehouseDataInteractor):
+    """Runs queries on BigQuery.
+
+    ``run_str_query`` goes through pandas_gbq. The ``query_to_*`` methods
+    read the query's result table with the Storage Read API instead: one
+    read session split into up to ``max_streams`` Arrow streams that are
+    drained concurrently, so results stay columnar end to end and
+    ``query_to_parquet`` never materializes the whole result. Batches of
+    different streams interleave, so a query whose result is ordered (a
+    top-level ORDER BY, unless ``preserve_order`` says otherwise) is read
+    through a single stream.
+
+    ``client`` (a ``bigquery.Client``) and ``read_client`` (a
+    ``bigquery_storage.BigQueryReadClient``) are created on first use
+    unless given, so fakes serving canned record batches can be injected.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        read_client=None,
+        project_id: Optional[str] = None,
+        max_streams: int = 8,
+    ):
+        super().__init__(client=client, project_id=project_id)
+        self._read_client = read_client
+        self.max_streams = max_streams
+
+    @property
+    def read_client(self):
+        if self._read_client is None:
+            self._read_client = bigquery_storage.BigQueryReadClient()
+        return self._read_client
+
+    def _read_session(
+        self, query: str, max_streams: Optional[int], preserve_order: Optional[bool]
+    ):
+        if preserve_order is None:
+            preserve_order = has_top_level_order_by(query)
+        if preserve_order:
+            max_streams = 1
+        job = self.client.query(query, project=self.project_id)
+        job.result()
+        table = job.destination
+        requested = bigquery_storage.types.ReadSession(
+            table="projects/{}/datasets/{}/tables/{}".format(
+                table.project, table.dataset_id, table.table_id
+            ),
+            data_format=bigquery_storage.types.DataFormat.ARROW,
+        )
+        return self.read_client.create_read_session(
+            parent="projects/{}".format(self.project_id),
+            read_session=requested,
+            max_stream_count=max_streams or self.max_streams,
+        )
+
+    @staticmethod
+    def _session_schema(session) -> pa.Schema:
+        return pa.ipc.read_schema(
+            pa.py_buffer(session.arrow_schema.serialized_schema)
+        )
+
+    def _read_stream(self, stream_name, session, out: queue.Queue, stop) -> None:
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    out.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        try:
+            reader = self.read_client.read_rows(stream_name)
+            for page in reader.rows(session).pages:
+                if not put(page.to_arrow()):
+                    return
+        except Exception as e:
+            put(e)
+        finally:
+            put(_STREAM_DONE)
+
+    def _iter_session(self, session) -> Iterator[pa.RecordBatch]:
+        streams = [stream.name for stream in session.streams]
+        if not streams:
+            return
+
+        # bounded, so slow consumers throttle the streams instead of
+        # buffering the whole result
+        out = queue.Queue(maxsize=2 * len(streams))
+        stop = threading.Event()
+        with ThreadPoolExecutor(max_workers=len(streams)) as executor:
+            for stream in streams:
+                executor.submit(self._read_stream, stream, session, out, stop)
+            try:
+                pending = len(streams)
+                while pending:
+                    item = out.get()
+                    if item is _STREAM_DONE:
+                        pending -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                stop.set()
+
+    def iter_query_batches(
+        self,
+        query: str,
+        max_streams: Optional[int] = None,
+        preserve_order: Optional[bool] = None,
+    ) -> Iterator[pa.RecordBatch]:
+        """Yield the query result as Arrow record batches, in arrival order."""
+        yield from self._iter_session(
+            self._read_session(query, max_streams, preserve_order)
+        )
+
+    def query_to_arrow(
+        self,
+        query: str,
+        max_streams: Optional[int] = None,
+        preserve_order: Optional[bool] = None,
+    ) -> pa.Table:
+        """Runs an SQL query and returns the result as an Arrow table."""
+        session = self._read_session(query, max_streams, preserve_order)
+        return pa.Table.from_batches(
+            list(self._iter_session(session)), schema=self._session_schema(session)
+        )
+
+    def query_to_pandas(
+        self,
+        query: str,
+        max_streams: Optional[int] = None,
+        preserve_order: Optional[bool] = None,
+    ) -> pd.DataFrame:
+        """Runs an SQL query and returns a DataFrame with Arrow-backed dtypes."""
+        return self.query_to_arrow(query, max_streams, preserve_order).to_pandas(
+            types_mapper=pd.ArrowDtype
+        )
+
+    def query_to_parquet(
+        self,
+        query: str,
+        path: str,
+        max_streams: Optional[int] = None,
+        preserve_order: Optional[bool] = None,
+    ) -> int:
+        """Stream an SQL query result into a Parquet file, returning the rows.
+
+        Args:
+            query (str): The SQL query to be executed.
+            path (str): Output path relative to the data folder, e.g.
+                "raw/file_name.parquet".
+            preserve_order (bool): Read through a single stream to keep the
+                order of the result. Defaults to whether the query has a
+                top-level ORDER BY.
+        """
+        session = self._read_session(query, max_streams, preserve_order)
+        full_path = get_data_path(path)
+        tmp_path = "{}.{}.tmp".format(full_path, os.getpid())
+
+        n_rows = 0
+        try:
+            with pq.ParquetWriter(tmp_path, self._session_schema(session)) as writer:
+                for batch in self._iter_session(session):
+                    writer.write_batch(batch)
+                    n_rows += batch.num_rows
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, full_path)
+
+        print("File {} written successfully".format(path))
+        return n_rows
 
     def run_str_query(
         self, query: str, progress_bar_type: Optional[str] = "tqdm"
@@ -103,37 +827,300 @@ class BigQueryDataInteractor(WarehouseDataInteractor):
         """
         df = pandas_gbq.read_gbq(
             query,
-            project_id=Config().GCP_PROJECT,
+            project_id=self.project_id,
             dialect="standard",
             progress_bar_type=progress_bar_type,
         )
         return df
 
+    def _load_chunk(
+        self, df: pd.DataFrame, destination: str, schema: pa.Schema, job_config: dict
+    ) -> int:
+        buffer = io.BytesIO()
+        pq.write_table(
+            pa.Table.from_pandas(df, schema=schema, preserve_index=False), buffer
+        )
+        buffer.seek(0)
+        job = self.client.load_table_from_file(
+            buffer, destination, job_config=bigquery.LoadJobConfig(**job_config)
+        )
+        job.result()
+        return len(df)
+
     def insert_table(
         self,
         df: pd.DataFrame,
         table_name: str,
         dataset_id: str,
         project_id: str,
-        table_schema: dict = None,
+        table_schema: list = None,
         if_exists: str = "replace",
-    ):
+        chunksize: int = 500_000,
+        max_in_flight: int = 4,
+    ) -> dict:
         """
         Insert a pandas dataframe into a table
+
+        The frame is sent as Parquet chunks of ``chunksize`` rows, serialized
+        and loaded by up to ``max_in_flight`` concurrent load jobs. The first
+        chunk applies ``if_exists`` ("fail", "replace" or "append") and the
+        rest are appended once it has landed. Every chunk uses the Arrow
+        schema of the whole frame, with all-null columns as strings.
+        ``table_schema``, in pandas_gbq's format, overrides the types of the
+        columns it lists, see merge_table_schema. A failure after the first
+        chunk leaves a partial table.
+
+        Returns the number of rows, load jobs, seconds and rows per second.
         """
-        table_id = f"{dataset_id}.{table_name}"
-        pandas_gbq.to_gbq(
-            df,
-            table_id,
-            project_id=project_id,
-            table_schema=table_schema,
-            if_exists=if_exists,
+        if if_exists not in _WRITE_DISPOSITIONS:
+            raise ValueError(
+                "if_exists must be one of {}".format(list(_WRITE_DISPOSITIONS))
+            )
+
+        destination = "{}.{}.{}".format(project_id, dataset_id, table_name)
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        # all-null object columns are inferred as the null type, which
+        # BigQuery rejects
+        for i, field in enumerate(schema):
+            if pa.types.is_null(field.type):
+                schema = schema.set(i, field.with_type(pa.string()))
+        job_config = {"source_format": "PARQUET"}
+        if table_schema is not None:
+            job_config["schema"] = merge_table_schema(schema, table_schema)
+        starts = range(0, max(len(df), 1), chunksize)
+
+        start_time = time.perf_counter()
+        n_rows = self._load_chunk(
+            df.iloc[:chunksize],
+            destination,
+            schema,
+            dict(job_config, write_disposition=_WRITE_DISPOSITIONS[if_exists]),
+        )
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            futures = [
+                executor.submit(
+                    self._load_chunk,
+                    df.iloc[start : start + chunksize],
+                    destination,
+                    schema,
+                    dict(job_config, write_disposition="WRITE_APPEND"),
+                )
+                for start in starts[1:]
+            ]
+            n_rows += sum(future.result() for future in futures)
+        seconds = time.perf_counter() - start_time
+
+        stats = {
+            "rows": n_rows,
+            "jobs": len(starts),
+            "seconds": seconds,
+            "rows_per_sec": n_rows / seconds if seconds > 0 else float("inf"),
+        }
+        print(
+            "Table {} written successfully: {} rows in {:.1f}s ({:,.0f} rows/s)".format(
+                destination, n_rows, seconds, stats["rows_per_sec"]
+            )
+        )
+        return stats
+
+
+class AsyncBigQueryDataInteractor(_BigQueryClient, AsyncWarehouseDataInteractor):
+    """Runs queries on BigQuery without blocking the event loop.
+
+    At most ``max_concurrency`` queries run at once per event loop, the
+    others wait their turn. The blocking client calls run in the loop's
+    default executor and the job is polled every ``poll_interval`` seconds.
+    A query cancelled or timed out while running has its BigQuery job
+    cancelled too.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        project_id: Optional[str] = None,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None,
+        poll_interval: float = 1.0,
+    ):
+        super().__init__(client=client, project_id=project_id)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    @staticmethod
+    def _cancel_job(loop: asyncio.AbstractEventLoop, job) -> None:
+        """Cancel the job from the executor, without waiting for the API call."""
+
+        def log_failure(future):
+            if future.exception() is not None:
+                logging.warning(
+                    "Could not cancel job {}: {}".format(
+                        job.job_id, future.exception()
+                    )
+                )
+
+        loop.run_in_executor(None, job.cancel).add_done_callback(log_failure)
+
+    def _cancel_submitted(self, loop: asyncio.AbstractEventLoop, submission) -> None:
+        if not submission.cancelled() and submission.exception() is None:
+            self._cancel_job(loop, submission.result())
+
+    async def _run(self, query: str) -> pd.DataFrame:
+        loop = asyncio.get_running_loop()
+        submission = loop.run_in_executor(
+            None, functools.partial(self.client.query, query, project=self.project_id)
         )
+        try:
+            # shielded, so a job submitted while the query is cancelled is
+            # still known, and cancelled as soon as it is created
+            job = await asyncio.shield(submission)
+        except asyncio.CancelledError:
+            submission.add_done_callback(
+                functools.partial(self._cancel_submitted, loop)
+            )
+            raise
+        try:
+            while not await loop.run_in_executor(None, job.done):
+                await asyncio.sleep(self.poll_interval)
+            return await loop.run_in_executor(None, job.to_dataframe)
+        except asyncio.CancelledError:
+            self._cancel_job(loop, job)
+            raise
+
+    async def run_str_query(
+        self, query: str, timeout: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Runs an SQL query on the database and returns the result as a pandas DataFrame.
+
+        Args:
+            query (str): The SQL query to be executed.
+            timeout (float): Seconds, counted once the query gets a slot,
+                before it is cancelled. Defaults to the interactor's.
+
+        Returns:
+            pd.DataFrame: The result of the query execution as a DataFrame.
+        """
+        async with self._semaphore():
+            return await asyncio.wait_for(
+                self._run(query), self.timeout if timeout is None else timeout
+            )
+
+
+_NON_DETERMINISTIC = {
+    "CURRENT_DATE",
+    "CURRENT_DATETIME",
+    "CURRENT_TIME",
+    "CURRENT_TIMESTAMP",
+    "GENERATE_UUID",
+    "RAND",
+    "SESSION_USER",
+}
+
+
+def is_cacheable(query: str) -> bool:
+    """Whether the query only reads, with a result depending on the data alone.
+
+    Only SELECT and WITH statements without calls such as CURRENT_DATE() or
+    RAND() qualify; DDL, DML and scripts always run.
+    """
+    words = [
+        word.upper()
+        for word in _SQL_WORDS.findall(normalize_query(query))
+        if word[0] not in "'\"`"
+    ]
+    if not words or words[0] not in ("SELECT", "WITH", "("):
+        return False
+    return not _NON_DETERMINISTIC.intersection(words)
+
+
+class CachedWarehouseDataInteractor(WarehouseDataInteractor):
+    """Caches the results of any WarehouseDataInteractor on disk.
+
+    Results are stored as Feather files keyed on the normalized query and
+    the warehouse's project, expire after ``ttl`` seconds and are evicted
+    least recently used first beyond ``max_bytes``. Only queries passing
+    ``is_cacheable`` are cached, the others always run. Results come back
+    with the dtypes they were cached with. Everything other than
+    ``run_str_query`` is forwarded to the wrapped warehouse.
+    """
+
+    def __init__(
+        self,
+        warehouse: WarehouseDataInteractor,
+        cache_dir: str = get_data_path("interim/.query_cache"),
+        ttl: Optional[float] = 12 * 3600,
+        max_bytes: Optional[int] = 10 * 1024**3,
+    ):
+        self.warehouse = warehouse
+        self.cache = DiskFrameCache(directory=cache_dir, max_bytes=max_bytes, ttl=ttl)
+
+    def __getattr__(self, name):
+        if name == "warehouse":
+            raise AttributeError(name)
+        return getattr(self.warehouse, name)
+
+    @property
+    def cache_stats(self) -> dict:
+        return dict(self.cache.stats)
+
+    def _cache_key(self, query: str) -> str:
+        project = getattr(self.warehouse, "project_id", None)
+        return hashlib.blake2b(
+            "{}\0{}".format(project, normalize_query(query)).encode(),
+            digest_size=16,
+        ).hexdigest()
+
+    def run_str_query(
+        self, query: str, refresh: bool = False, **kwargs
+    ) -> pd.DataFrame:
+        """Runs an SQL query, reusing a cached result when there is one.
+
+        Args:
+            query (str): The SQL query to be executed.
+            refresh (bool): Skip the cache lookup, run the query and cache
+                the new result.
+
+        Returns:
+            pd.DataFrame: The result of the query execution as a DataFrame.
+        """
+        if not is_cacheable(query):
+            return self.warehouse.run_str_query(query, **kwargs)
+
+        cache_id = self._cache_key(query)
+        if not refresh:
+            df = self.cache.get(cache_id)
+            if df is not None:
+                return df
+
+        df = self.warehouse.run_str_query(query, **kwargs)
+        self.cache.put(cache_id, df)
+        return df
 
 
 class DataInteractor:
+    """Every interactor of the project.
 
-    def __init__(self):
+    With ``cache_queries`` the BigQuery results are cached on disk, see
+    CachedWarehouseDataInteractor.
+    """
+
+    def __init__(self, cache_queries: bool = False):
         self.yaml = YAMLDataInteractor()
         self.csv = CSVDataInteractor()
-        self.bigquery = BigQueryDataInteractor()
+        self.bigquery = (
+            CachedWarehouseDataInteractor(BigQueryDataInteractor())
+            if cache_queries
+            else BigQueryDataInteractor()
+        )
+        self.async_bigquery = AsyncBigQueryDataInteractor()
+
+    def warehouse(self, asynchronous: bool = False):
+        """The BigQuery interactor, blocking or asyncio flavored."""
+        return self.async_bigquery if asynchronous else self.bigquery
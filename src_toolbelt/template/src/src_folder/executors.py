@@ -0,0 +1,155 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+if TYPE_CHECKING:
+    from $PROJECT_NAME$.protocols import Transformer
+
+Block = Union[str, pd.DataFrame]
+
+
+def _dump_block(df: pd.DataFrame, path: str) -> Block:
+    """Write a block as an Arrow IPC file, or keep the frame if Arrow can't
+    hold it (e.g. interval categories or mixed-type object columns)."""
+    # interval categories are written but can't be read back
+    if any(
+        isinstance(dtype, pd.CategoricalDtype)
+        and isinstance(dtype.categories.dtype, pd.IntervalDtype)
+        for dtype in df.dtypes
+    ):
+        return df
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowException, TypeError, ValueError):
+        return df
+    with pa.OSFile(path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return path
+
+
+def _load_block(block: Block) -> pd.DataFrame:
+    if isinstance(block, pd.DataFrame):
+        return block
+    with pa.memory_map(block) as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def _transform_block(
+    transformers: List["Transformer"], block: Block, out_path: str
+) -> Block:
+    X = _load_block(block)
+    for transformer in transformers:
+        X = transformer.transform(X)
+    return _dump_block(X, out_path)
+
+
+def _concat(blocks: List[pd.DataFrame], ignore_index: bool) -> pd.DataFrame:
+    X = pd.concat(blocks, ignore_index=ignore_index)
+    # blocks categorized on their own values come back as object
+    for column in blocks[0].columns:
+        if not isinstance(X[column].dtype, pd.CategoricalDtype) and all(
+            isinstance(block[column].dtype, pd.CategoricalDtype) for block in blocks
+        ):
+            try:
+                X[column] = pd.api.types.union_categoricals(
+                    [block[column] for block in blocks], sort_categories=True
+                )
+            except (TypeError, ValueError):
+                pass
+    return X
+
+
+class ShardedExecutor:
+    """Runs a chain of transformers over row blocks in a process pool.
+
+    The frame is cut into ``n_shards`` blocks (``4 * n_jobs`` by default)
+    that travel to and from the workers as memory-mapped Arrow IPC files
+    under ``tmp_dir``, and the results are concatenated in order. Row-local
+    transformers run on the blocks as they are; one that needs a fit is
+    fitted on the whole output of the transformers before it and sent
+    fitted to the workers. Others (e.g. Cleaner dropping duplicates) are
+    rejected.
+    """
+
+    def __init__(
+        self,
+        n_jobs: Optional[int] = None,
+        n_shards: Optional[int] = None,
+        tmp_dir: Optional[str] = None,
+    ) -> None:
+
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.n_shards = n_shards or 4 * self.n_jobs
+        self.tmp_dir = tmp_dir
+
+    def _run_segment(
+        self,
+        transformers: List["Transformer"],
+        X: pd.DataFrame,
+        pool: ProcessPoolExecutor,
+        directory: str,
+        segment: int,
+    ) -> pd.DataFrame:
+
+        paths = []
+        blocks = []
+        for shard, positions in enumerate(
+            np.array_split(np.arange(len(X)), min(self.n_shards, max(len(X), 1)))
+        ):
+            path = os.path.join(directory, "{}-{}".format(segment, shard))
+            paths.append(path + ".out")
+            blocks.append(_dump_block(X.iloc[positions], path + ".in"))
+
+        results = pool.map(
+            _transform_block, [transformers] * len(blocks), blocks, paths
+        )
+        return _concat(
+            [_load_block(block) for block in results],
+            ignore_index=any(t.resets_index_ for t in transformers),
+        )
+
+    def run(
+        self, transformers: List["Transformer"], X: pd.DataFrame, fit: bool = True
+    ) -> pd.DataFrame:
+        """Apply the transformers in order to X, returning the new frame.
+
+        Args:
+            transformers: Chain to apply, as in PipelineStep.plan.steps.
+            X: Input frame, left untouched.
+            fit: Fit the transformers that need it before sharding them;
+                False uses them as already fitted.
+        """
+        for transformer in transformers:
+            if not (transformer.is_row_local_ or transformer.needs_fit()):
+                raise ValueError(
+                    "{} needs the whole dataset and cannot run on shards".format(
+                        transformer.__class__.__name__
+                    )
+                )
+
+        # segments end right before each transformer to fit, whose
+        # statistics come from the output of the previous segment
+        segments = [[]]
+        for transformer in transformers:
+            if fit and transformer.needs_fit() and segments[-1]:
+                segments.append([])
+            segments[-1].append(transformer)
+
+        directory = tempfile.mkdtemp(prefix="shards-", dir=self.tmp_dir)
+        try:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as pool:
+                for i, segment in enumerate(segments):
+                    if fit and segment and segment[0].needs_fit():
+                        segment[0].fit(X)
+                    if segment:
+                        X = self._run_segment(segment, X, pool, directory, i)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        return X
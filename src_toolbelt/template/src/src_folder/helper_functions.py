@@ -1,5 +1,16 @@
+import functools
 import logging
 import sys
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from unidecode import unidecode
+
+# same edits as the former chained str.replace calls; ``str.split`` below
+# also takes care of the surrounding whitespace ``str.strip`` used to remove
+_TEXT_TRANSLATION_TABLE = str.maketrans({"%": "pct", "-": None, "/": None, ".": None})
 
 
 def check_integrity(key, var_type):
@@ -12,3 +23,159 @@ def check_integrity(key, var_type):
             "The config file is corrupted in {} key!".format(_namestr, globals())
         )
         sys.exit(1)
+
+
+@functools.lru_cache(maxsize=2**16)
+def normalize_text(text: str) -> str:
+    """Lowercase, transliterate and snake_case a single string.
+
+    Results are kept in a bounded LRU shared by every caller, so values seen
+    in previous calls or other columns are not normalized again.
+    """
+    return "_".join(unidecode(text.lower().translate(_TEXT_TRANSLATION_TABLE)).split())
+
+
+def normalize_texts(values: pd.Series) -> pd.Series:
+    """Normalize a column of texts, one ``normalize_text`` call per unique value.
+
+    Null values are kept as they are.
+    """
+    codes, uniques = pd.factorize(values)
+    normalized = np.array([normalize_text(value) for value in uniques], dtype=object)
+
+    result = values.to_numpy(dtype=object, copy=True)
+    valid = codes != -1
+    result[valid] = normalized[codes[valid]]
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(
+        values, index=False, categorize=False
+    ).to_numpy(copy=True)
+
+
+def _value_hashes(values: pd.Series) -> np.ndarray:
+
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_float_dtype(values):
+        return _hash(values.astype("float64"))
+    if pd.api.types.is_integer_dtype(values):
+        hashes = _hash(values.astype("float64"))
+        # integers a float64 can't hold exactly keep their own hash
+        inexact = (values.abs() > 2**53).fillna(False).to_numpy(dtype=bool)
+        hashes[inexact] = _hash(values[inexact])
+        return hashes
+    return _hash(values)
+
+
+def row_hashes(X: pd.DataFrame, columns: list) -> np.ndarray:
+    """64-bit hash of each row over the given columns.
+
+    Each column is factorized and only its distinct values are hashed, which
+    keeps repeated strings cheap; hashes depend on the values alone, so they
+    match across chunks of the same data. Numbers are hashed as float64, so
+    equal values match whether a chunk read a column as int, bool or float.
+    """
+    hashes = np.zeros(len(X), dtype=np.uint64)
+    for column in columns:
+        codes, uniques = pd.factorize(X[column], use_na_sentinel=False)
+        unique_hashes = _value_hashes(pd.Series(uniques))
+        hashes = hashes * np.uint64(0x100000001B3) ^ unique_hashes[codes]
+    return hashes
+
+
+def duplicated_rows(
+    X: pd.DataFrame, columns: list, keep="first", hashes: np.ndarray = None
+) -> np.ndarray:
+    """Boolean mask matching ``X.duplicated(subset=columns, keep=keep)``.
+
+    Rows are matched on their hash; only rows sharing a hash are compared
+    value by value, and the few hash groups where values differ (collisions)
+    are resolved with an exact ``duplicated`` on those rows alone.
+    """
+    if hashes is None:
+        hashes = row_hashes(X, columns)
+    # codes follow the order of first appearance, so first[code] is the
+    # position of the first row with that hash
+    codes, _ = pd.factorize(hashes)
+    first = np.unique(codes, return_index=True)[1]
+    shared = np.bincount(codes)[codes] > 1
+    if not shared.any():
+        return np.zeros(len(X), dtype=bool)
+
+    rows = np.flatnonzero(shared)
+    firsts = first[codes[rows]]
+    equal = np.ones(len(rows), dtype=bool)
+    for column in columns:
+        left = X[column].iloc[rows].reset_index(drop=True)
+        right = X[column].iloc[firsts].reset_index(drop=True)
+        equal &= (left == right).fillna(False).to_numpy(dtype=bool) | (
+            left.isna() & right.isna()
+        ).to_numpy()
+
+    duplicated = pd.Series(codes).duplicated(keep=keep).to_numpy(copy=True)
+    collided = np.isin(codes, codes[rows[~equal]])
+    if collided.any():
+        duplicated[collided] = (
+            X[columns].iloc[np.flatnonzero(collided)].duplicated(keep=keep).to_numpy()
+        )
+    return duplicated
+
+
+class RowHashSet:
+    """Sorted set of row hashes, to drop rows already seen in earlier chunks.
+
+    Holds 8 bytes per distinct row, so deduplicating a stream only needs the
+    hashes in memory, not the rows. Matches across chunks rely on the hash
+    alone.
+    """
+
+    def __init__(self) -> None:
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes)
+        positions = np.minimum(positions, len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+    def add(self, hashes: np.ndarray) -> None:
+        new = np.unique(hashes)
+        new = new[~self.contains(new)]
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, new), new)
+
+
+def to_csr(X: pd.DataFrame) -> Tuple[sparse.csr_matrix, List[str]]:
+    """CSR matrix of a numeric frame, with its column names.
+
+    Sparse columns go in from their stored values alone, so one-hot columns
+    from ``Dumminizer(sparse=True)`` are never densified. They must be
+    filled with zeros, as CSR has no other implicit value.
+    """
+    blocks = []
+    for column in X.columns:
+        values = X[column].array
+        if isinstance(values.dtype, pd.SparseDtype):
+            if not values.fill_value == 0:
+                raise ValueError(
+                    "Column {} is filled with {}, only zero-filled sparse "
+                    "columns fit a CSR matrix".format(column, values.fill_value)
+                )
+            rows = values.sp_index.indices
+            blocks.append(
+                sparse.csc_matrix(
+                    (values.sp_values.astype(float), (rows, np.zeros_like(rows))),
+                    shape=(len(X), 1),
+                )
+            )
+        else:
+            blocks.append(
+                sparse.csc_matrix(X[column].to_numpy(dtype=float).reshape(-1, 1))
+            )
+    if not blocks:
+        return sparse.csr_matrix((len(X), 0)), []
+    return sparse.hstack(blocks, format="csr"), list(X.columns)
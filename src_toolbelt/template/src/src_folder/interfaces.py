@@ -1,28 +1,87 @@
-from typing import List, Tuple
+import inspect
+import os
+from typing import List, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
 
 from $PROJECT_NAME$.data_interactor import DataInteractor
-from $PROJECT_NAME$.metrics import generate_metrics
+from $PROJECT_NAME$.metrics import MetricsAggregator, generate_metrics
 from $PROJECT_NAME$.models import ModelClassLookupCallback
 from $PROJECT_NAME$.splitters import SplitterClassLookupCallback
 
 
+def _fit_predict_fold(model, X_train, y_train, X_test, return_model=False):
+
+    X_train_ = X_train.copy()
+    X_test_ = X_test.copy()
+    categorical_features = list(
+        X_train_.dtypes[
+            (X_train_.dtypes == "object") | (X_train_.dtypes == "category")
+        ].index
+    )
+    for feat in categorical_features:
+        encoder = {k: i for i, k in enumerate(X_train_[feat].unique())}
+        X_train_[feat] = X_train_[feat].map(encoder).astype("category")
+        X_test_[feat] = X_test_[feat].map(encoder).astype("category")
+    model.fit(X=X_train_, y=y_train)
+    preds = model.predict(X=X_test_)
+    return (model, preds) if return_model else preds
+
+
+class Folds(Sequence):
+    """Lazy sequence of (X, y) folds.
+
+    Only the integer positions of each fold are kept (as a slice when they
+    are contiguous, e.g. on date-sorted data); the fold frames are built
+    from X and y one at a time, when the fold is accessed.
+    """
+
+    def __init__(
+        self, X: pd.DataFrame, y: pd.Series, indices: List[np.ndarray]
+    ) -> None:
+
+        self.X = X
+        self.y = y
+        self.indices = [self._compact(idx) for idx in indices]
+
+    @staticmethod
+    def _compact(idx) -> Union[slice, np.ndarray]:
+
+        if isinstance(idx, slice):
+            return idx
+        idx = np.asarray(idx, dtype=np.int64)
+        if len(idx) > 0 and np.all(np.diff(idx) == 1):
+            return slice(int(idx[0]), int(idx[-1]) + 1)
+        if len(idx) > 0 and idx.max() < np.iinfo(np.int32).max:
+            return idx.astype(np.int32)
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, i):
+
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+
+        idx = self.indices[i]
+        return self.X.iloc[idx], self.y.iloc[idx]
+
+
 class SplitterInteractor:
 
     def __init__(self, splitter_name: str) -> None:
 
         self.di = DataInteractor()
-        self.di.config = self.di.config()
 
         self._splitter_name = splitter_name
         self._splitter_class = SplitterClassLookupCallback(splitter_name)
 
     def load_params(self, params_path: str) -> None:
 
-        self.di.config.load("splitting", params_path)
-        params = self.di.config.params["splitting"]
+        params = self.di.yaml.load("splitting", params_path)
         self.splitter = self._splitter_class(**params)
 
     def split(self, dataset: pd.DataFrame, target_col: str, drop_cols: list) -> None:
@@ -31,13 +90,9 @@ class SplitterInteractor:
 
         X = dataset.drop(drop_cols + [target_col], axis=1)
         y = dataset[target_col]
-        trains, tests = [], []
-        for train_idx, test_idx in splits:
-            trains.append((X.iloc[train_idx], y.iloc[train_idx]))
-            tests.append((X.iloc[test_idx], y.iloc[test_idx]))
 
-        self.trains = trains
-        self.tests = tests
+        self.trains = Folds(X, y, [train_idx for train_idx, _ in splits])
+        self.tests = Folds(X, y, [test_idx for _, test_idx in splits])
 
 
 class ModelInteractor:
@@ -59,8 +114,8 @@ class ModelInteractor:
     def load_data(
         self,
         raw_data: pd.DataFrame,
-        trains: List[Tuple[pd.DataFrame, pd.Series]],
-        tests: List[Tuple[pd.DataFrame, pd.Series]],
+        trains: Sequence[Tuple[pd.DataFrame, pd.Series]],
+        tests: Sequence[Tuple[pd.DataFrame, pd.Series]],
     ) -> None:
 
         self.raw_data = raw_data
@@ -70,6 +125,7 @@ class ModelInteractor:
     def fit_predict(
         self,
         model_parameters: dict = {},
+        n_jobs: int = 1,
     ) -> None:
 
         self._instantiate_model(model_parameters)
@@ -77,24 +133,42 @@ class ModelInteractor:
         if not hasattr(self, "trains"):
             raise ValueError("Data not found. Please run load_data first.")
 
-        preds = []
-        for (X_train, y_train), (X_test, y_test) in zip(self.trains, self.tests):
-            X_train_ = X_train.copy()
-            X_test_ = X_test.copy()
-            categorical_features = list(
-                X_train_.dtypes[
-                    (X_train_.dtypes == "object") | (X_train_.dtypes == "category")
-                ].index
+        folds = zip(self.trains, self.tests)
+        n_jobs = min(effective_n_jobs(n_jobs), len(self.trains))
+        if n_jobs == 1:
+            preds = [
+                _fit_predict_fold(self.model, X_train, y_train, X_test)
+                for (X_train, y_train), (X_test, _) in folds
+            ]
+        else:
+            # every fold gets a fresh model with the same parameters (and
+            # seed) and an even share of the cores; joblib memmaps the fold
+            # arrays instead of pickling them into each worker
+            parameters = self._fold_model_parameters(model_parameters, n_jobs)
+            last = len(self.trains) - 1
+            preds = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_predict_fold)(
+                    self.model_class(**parameters),
+                    X_train,
+                    y_train,
+                    X_test,
+                    return_model=i == last,
+                )
+                for i, ((X_train, y_train), (X_test, _)) in enumerate(folds)
             )
-            for feat in categorical_features:
-                encoder = {k: i for i, k in enumerate(X_train_[feat].unique())}
-                X_train_[feat] = X_train_[feat].map(encoder).astype("category")
-                X_test_[feat] = X_test_[feat].map(encoder).astype("category")
-            self.model.fit(X=X_train_, y=y_train)
-            preds.append(self.model.predict(X=X_test_))
+            # as in the sequential loop, self.model ends fitted on the last fold
+            self.model, preds[-1] = preds[-1]
 
         self.predictions = preds
 
+    def _fold_model_parameters(self, model_parameters: dict, n_jobs: int) -> dict:
+
+        parameters = dict(model_parameters)
+        accepted = inspect.signature(self.model_class.instance.__init__).parameters
+        if "thread_count" in accepted and "thread_count" not in parameters:
+            parameters["thread_count"] = max(1, (os.cpu_count() or 1) // n_jobs)
+        return parameters
+
     def calculate_metrics(self) -> None:
 
         metrics = []
@@ -123,10 +197,16 @@ class ModelInteractor:
         if not hasattr(self, "predictions"):
             raise ValueError("Predictions not found. Please run fit_predict first.")
 
-        self.calculate_metrics()
+        aggregator = MetricsAggregator(
+            model_type=self.model_class.instance.model_type_, metrics=[metric]
+        )
+        for (X_test, y_test), preds in zip(self.tests, self.predictions):
+            aggregator.update(y_true=y_test, y_pred=preds)
+
+        result = aggregator.result()[metric]
         metrics = {
-            "avg": np.mean(self.metrics[metric]),
-            "std": np.std(self.metrics[metric]),
+            "avg": result["avg"],
+            "std": result["std"],
         }
         self.evaluated_metrics = metrics
 
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Callable, Dict, List, Literal, Optional
 
 import numpy as np
 import pandas as pd
@@ -24,6 +24,15 @@ def mape(a: float, b: float) -> float:
     return np.abs(a - b) / b
 
 
+_REGRESSION_METRICS: Dict[str, Callable] = {
+    "mse": mse,
+    "rmse": rmse,
+    "smape": smape,
+    "mae": mae,
+    "mape": mape,
+}
+
+
 def generate_metrics(
     y_true: pd.Series,
     y_pred: pd.Series,
@@ -35,16 +44,84 @@ def generate_metrics(
 
     if model_type == "regression":
         dataset = pd.DataFrame({"y_true": y_true, "y_pred": y_pred})
-        dataset["mse"] = dataset.apply(lambda x: mse(x["y_true"], x["y_pred"]), axis=1)
-        dataset["rmse"] = dataset.apply(
-            lambda x: rmse(x["y_true"], x["y_pred"]), axis=1
-        )
-        dataset["smape"] = dataset.apply(
-            lambda x: smape(x["y_true"], x["y_pred"]), axis=1
-        )
-        dataset["mae"] = dataset.apply(lambda x: mae(x["y_true"], x["y_pred"]), axis=1)
-        dataset["mape"] = dataset.apply(
-            lambda x: mape(x["y_true"], x["y_pred"]), axis=1
-        )
+        a = dataset["y_true"].to_numpy(dtype=float)
+        b = dataset["y_pred"].to_numpy(dtype=float)
+        for name, metric in _REGRESSION_METRICS.items():
+            dataset[name] = metric(a, b)
 
         return dataset
+
+
+class MetricsAggregator:
+    """Running sum, mean and std of per-row metrics.
+
+    Batches are folded in with ``update`` and only the count, sum, mean and
+    sum of squared deviations of each metric are kept, so the per-row
+    metrics DataFrame is never materialized. NaN metrics (e.g. smape when
+    both values are 0) are skipped, as pandas does.
+    """
+
+    def __init__(
+        self,
+        model_type: Literal["regression", "classification"],
+        metrics: Optional[List[str]] = None,
+    ) -> None:
+
+        if model_type == "classification":
+            raise NotImplementedError("Classification metrics are not implemented yet.")
+
+        self.model_type = model_type
+        self.metrics = metrics or list(_REGRESSION_METRICS)
+        for metric in self.metrics:
+            if metric not in _REGRESSION_METRICS:
+                raise KeyError(
+                    "Metric {} invalid or not implemented. The available metrics are: {}".format(
+                        metric, ", ".join(_REGRESSION_METRICS.keys())
+                    )
+                )
+
+        self.count = 0
+        self._count = dict.fromkeys(self.metrics, 0)
+        self._sum = dict.fromkeys(self.metrics, 0.0)
+        self._mean = dict.fromkeys(self.metrics, 0.0)
+        self._m2 = dict.fromkeys(self.metrics, 0.0)
+
+    def update(self, y_true, y_pred) -> "MetricsAggregator":
+        a = np.asarray(y_true, dtype=float)
+        b = np.asarray(y_pred, dtype=float)
+        n = len(a)
+        if n == 0:
+            return self
+
+        for name in self.metrics:
+            values = _REGRESSION_METRICS[name](a, b)
+            values = values[~np.isnan(values)]
+            count, batch = self._count[name], len(values)
+            if batch == 0:
+                continue
+            total = count + batch
+            batch_mean = values.mean()
+            batch_m2 = ((values - batch_mean) ** 2).sum()
+            # Chan et al. pairwise update of mean and M2
+            delta = batch_mean - self._mean[name]
+            self._sum[name] += values.sum()
+            self._mean[name] += delta * batch / total
+            self._m2[name] += batch_m2 + delta**2 * count * batch / total
+            self._count[name] = total
+        self.count += n
+
+        return self
+
+    def result(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: (
+                {
+                    "sum": self._sum[name],
+                    "avg": self._mean[name],
+                    "std": np.sqrt(self._m2[name] / self._count[name]),
+                }
+                if self._count[name]
+                else {"sum": 0.0, "avg": np.nan, "std": np.nan}
+            )
+            for name in self.metrics
+        }
@@ -10,7 +10,15 @@ class CatBoostModel(Model):
     model_type_ = "regression"
     is_tunable_ = True
 
-    def __init__(self, learning_rate=0.1, depth=6, l2_leaf_reg=3, random_strength=1):
+    def __init__(
+        self,
+        learning_rate=0.1,
+        depth=6,
+        l2_leaf_reg=3,
+        random_strength=1,
+        random_seed=0,
+        thread_count=-1,
+    ):
 
         super().__init__()
 
@@ -19,16 +27,19 @@ class CatBoostModel(Model):
             depth=depth,
             l2_leaf_reg=l2_leaf_reg,
             random_strength=random_strength,
+            random_seed=random_seed,
+            thread_count=thread_count,
             verbose=0,
         )
 
     def fit(self, X, y) -> None:
-        X_ = X.copy()
-        X_ = X_.drop(columns=["scale_id"])
+        X_ = X.drop(columns=["scale_id"])
+        cat_features = [col for col in X_.dtypes[X_.dtypes == "category"].index]
+        # without categorical features, sparse dummies are passed as CSR
         self.model.fit(
-            X_,
+            self._model_input(X_) if not cat_features else X_,
             y,
-            cat_features=[col for col in X_.dtypes[X_.dtypes == "category"].index],
+            cat_features=cat_features,
         )
         self.is_fitted_ = True
 
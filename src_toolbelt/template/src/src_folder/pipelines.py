@@ -1,4 +1,5 @@
 import logging
+from typing import Dict, List, Optional, Sequence
 
 from $PROJECT_NAME$.protocols import PipelineStep
 from $PROJECT_NAME$.transformers import (
@@ -26,10 +27,7 @@ class DataCleaning(PipelineStep):
         output_path="",
         params_path="",
         input_path="",
-        input_specs={
-            "low_memory": False,
-            "encoding": "utf-8",
-        },
+        input_specs=None,
         input_data=None,
     ):
         super().__init__(
@@ -38,9 +36,7 @@ class DataCleaning(PipelineStep):
             input_specs=input_specs,
             input_data=input_data,
         )
-        self.di.config = self.di.config()
-        self.di.config.load("cleaning", params_path)
-        self.params = self.di.config.params["cleaning"]
+        self.params = self.di.yaml.load("cleaning", params_path)
         self.cleaner = Cleaner(
             variable_columns=self.params["variable_columns"],
             duplicate_columns=self.params["duplicate_columns"],
@@ -49,13 +45,13 @@ class DataCleaning(PipelineStep):
             filter_notnull_columns=self.params["filter_notnull_columns"],
             filter_other_meta=self.params["filter_other_meta"],
             filter_custom_query_columns=self.params["filter_custom_query_columns"],
-            filter_week_difference_meta=self.params["filter_week_difference_meta"],
         )
+        self.transformers = [self.cleaner, self.filter]
 
     def transform(self) -> None:
         if hasattr(self, "data"):
-            self.data = self.cleaner.transform(self.data)
-            self.data = self.filter.transform(self.data)
+            for transformer in self.plan.steps:
+                self.data = transformer.transform(self.data)
 
         else:
             logging.error("Data not found! Load it first.")
@@ -68,11 +64,9 @@ class DataPreprocessing(PipelineStep):
         output_path="",
         params_path="",
         input_path="",
-        input_specs={
-            "low_memory": False,
-            "encoding": "utf-8",
-        },
+        input_specs=None,
         input_data=None,
+        inplace=False,
     ):
         super().__init__(
             output_path=output_path,
@@ -80,10 +74,9 @@ class DataPreprocessing(PipelineStep):
             input_specs=input_specs,
             input_data=input_data,
         )
+        self.inplace = inplace
 
-        self.di.config = self.di.config()
-        self.di.config.load("preprocessing", params_path)
-        self.params = self.di.config.params["preprocessing"]
+        self.params = self.di.yaml.load("preprocessing", params_path)
 
         self.dropper = Dropper(drop_columns=self.params["drop_columns"])
         self.renamer = Renamer(rename_meta=self.params["rename_meta"])
@@ -114,17 +107,28 @@ class DataPreprocessing(PipelineStep):
             default_fill_meta=self.params["default_fill_meta"],
         )
 
+        self.transformers = [
+            self.dropper,
+            self.renamer,
+            self.binner,
+            self.mininum_percentage_filter,
+            self.binarizer,
+            self.encoder,
+            self.feature_transformer,
+            self.custom_transformer,
+            self.missing_inputer,
+        ]
+        for transformer in self.transformers:
+            transformer.inplace = inplace
+
     def transform(self) -> None:
         if hasattr(self, "data"):
-            self.data = self.dropper.transform(self.data)
-            self.data = self.renamer.transform(self.data)
-            self.data = self.binner.transform(self.data)
-            self.data = self.mininum_percentage_filter.transform(self.data)
-            self.data = self.binarizer.transform(self.data)
-            self.data = self.encoder.transform(self.data)
-            self.data = self.feature_transformer.transform(self.data)
-            self.data = self.custom_transformer.transform(self.data)
-            self.data = self.missing_inputer.transform(self.data)
+            if self.inplace:
+                # the loaded frame may be shared (input_data, interactor cache),
+                # so it is copied once and then owned by the transformer chain
+                self.data = self.data.copy()
+            for transformer in self.plan.steps:
+                self.data = transformer.transform(self.data)
         else:
             logging.error("Data not found! Load it first.")
 
@@ -136,10 +140,7 @@ class FeatureEngineering(PipelineStep):
         output_path="",
         params_path="",
         input_path="",
-        input_specs={
-            "low_memory": False,
-            "encoding": "utf-8",
-        },
+        input_specs=None,
         input_data=None,
     ):
         super().__init__(
@@ -148,20 +149,60 @@ class FeatureEngineering(PipelineStep):
             input_specs=input_specs,
             input_data=input_data,
         )
-        self.di.config = self.di.config()
-        self.di.config.load("feature_engineering", params_path)
-        self.params = self.di.config.params["feature_engineering"]
+        self.params = self.di.yaml.load("feature_engineering", params_path)
         self.selector = Selector(
             selection_drop_columns=self.params["selection_drop_columns"]
         )
-        self.dumminizer = Dumminizer(dummies_columns=self.params["dummies_columns"])
+        self.dumminizer = Dumminizer(
+            dummies_columns=self.params["dummies_columns"],
+            sparse=self.params.get("dummies_sparse", False),
+        )
         self.scaler = Scaler(scale_meta=self.params["scale_meta"])
+        self.transformers = [self.selector, self.dumminizer, self.scaler]
 
     def transform(self):
         if hasattr(self, "data"):
-            self.data = self.selector.transform(self.data)
-            self.data = self.dumminizer.transform(self.data)
-            self.data = self.scaler.transform(self.data)
+            for transformer in self.plan.steps:
+                self.data = transformer.transform(self.data)
             return self.data
         else:
             logging.error("Data not found! Load it first.")
+
+
+def execute_steps(
+    steps: List[PipelineStep],
+    force: Sequence[str] = (),
+    chunksize: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+    fit: bool = True,
+) -> Dict[str, str]:
+    """Execute steps in order, reusing cached outputs of unchanged steps.
+
+    Outputs are cached whatever the steps' ``cache_artifacts``.
+
+    Args:
+        steps: Steps to run, each reading what the previous ones wrote.
+        force: Steps to always run, as class names (every step of that class),
+            "ClassName(output_path)" keys, or "all".
+        chunksize: Run the executed steps in streaming mode.
+        n_jobs: Run the executed steps sharded over this many processes.
+        fit: Fit the transformers on each step's input, see
+            PipelineStep.execute.
+
+    Returns:
+        Dict[str, str]: "skipped" or "executed" per "ClassName(output_path)".
+    """
+    report = {}
+    for step in steps:
+        name = step.__class__.__name__
+        key = "{}({})".format(name, step._resolve_output_path())
+        step.execute(
+            chunksize=chunksize,
+            n_jobs=n_jobs,
+            force="all" in force or name in force or key in force,
+            fit=fit,
+            cache=True,
+        )
+        report[key] = "skipped" if step.skipped else "executed"
+        logging.info("{} {}".format(key, report[key]))
+    return report
@@ -1,13 +1,20 @@
+import glob
+import hashlib
+import json
+import os
+import shutil
 from abc import ABC, abstractmethod
-from typing import List, Literal, Tuple, Type, Union
+from typing import Iterator, List, Literal, Optional, Tuple, Type, Union
 
 import joblib
 import numpy as np
 import pandas as pd
 
 from $PROJECT_NAME$.data_interactor import DataInteractor
-from $PROJECT_NAME$.env_functions import get_models_path
-from $PROJECT_NAME$.metrics import generate_metrics
+from $PROJECT_NAME$ import get_models_path
+from $PROJECT_NAME$.executors import ShardedExecutor
+from $PROJECT_NAME$.helper_functions import to_csr
+from $PROJECT_NAME$.metrics import MetricsAggregator
 
 
 class Model(ABC):
@@ -35,57 +42,67 @@ class Model(ABC):
         for feat in categorical_features:
             encoder = {k: i for i, k in enumerate(X_[feat].unique())}
             X_[feat] = X_[feat].map(encoder).astype("category")
-        self.model.fit(X=X_, y=y)
+        self.model.fit(X=self._model_input(X_), y=y)
         self.is_fitted_ = True
 
         if "prior_prediction" in X.columns:
             self.prior_prediction_ = True
 
-    def _predict(self, X) -> np.array:
-        X_ = X.copy()
-        X_ = X_.drop(columns=["scale_id"])
-        return self.model.predict(X_)
-
-    def predict(self, X) -> np.array:
-
-        X_ = X.copy()
-
-        # predict for each scale id
-        scale_ids = X_["scale_id"].unique()
-        for scale_id in scale_ids:
-            X_.loc[X_["scale_id"] == scale_id, "prediction"] = self.predict_scale(
-                X, scale_id
-            )
-
-        return X_["prediction"].values
-
-    def predict_scale(self, X: pd.DataFrame, scale_id: int) -> np.array:
-
-        X_ = X[X["scale_id"] == scale_id].copy()
-
-        preds = []
-        max_days_diff = X_["days_diff_event_to_scale_limited"].max()
-        scale_order = [
-            max_days_diff - i for i in X_["days_diff_event_to_scale_limited"].values
+    @staticmethod
+    def _model_input(X: pd.DataFrame):
+        """Numeric frames with zero-filled sparse columns go to the model as CSR."""
+        sparse_dtypes = [
+            dtype for dtype in X.dtypes if isinstance(dtype, pd.SparseDtype)
         ]
+        if (
+            sparse_dtypes
+            and all(dtype.fill_value == 0 for dtype in sparse_dtypes)
+            and all(pd.api.types.is_numeric_dtype(dtype) for dtype in X.dtypes)
+        ):
+            return to_csr(X)[0]
+        return X
 
-        if self.prior_prediction_:
-
-            for i in range(max_days_diff + 1):
-                aux = X_[
-                    X_["days_diff_event_to_scale_limited"] == (max_days_diff - i)
-                ].copy()
-                aux["prior_prediction"] = preds[-1] if preds else 0
-                preds.append(self._predict(aux))
+    def _predict(self, X) -> np.array:
+        X_ = X.drop(columns=["scale_id"])
+        return self.model.predict(self._model_input(X_))
 
-        else:
-            preds = self._predict(X_)
-            return preds
+    def predict(self, X) -> np.array:
 
-        return np.array(preds).flatten()[scale_order]
+        if not self.prior_prediction_:
+            # rows are independent, so every scale id goes in a single call
+            return np.asarray(self._predict(X))
+
+        if X.empty:
+            return np.array([])
+
+        # advance all scale ids in lockstep: step k holds, for every scale id,
+        # the rows k days after its furthest event, and is predicted with the
+        # previous step's prediction of the same scale id as prior
+        days_diff = X["days_diff_event_to_scale_limited"]
+        steps = (
+            days_diff.groupby(X["scale_id"]).transform("max") - days_diff
+        ).to_numpy()
+        scale_ids = X["scale_id"].to_numpy()
+
+        order = np.argsort(steps, kind="stable")
+        boundaries = np.flatnonzero(np.diff(steps[order])) + 1
+
+        preds = np.zeros(len(X))
+        prior = {}
+        for positions in np.split(order, boundaries):
+            aux = X.iloc[positions].copy()
+            aux["prior_prediction"] = [
+                prior.get(scale_id, 0) for scale_id in scale_ids[positions]
+            ]
+            step_preds = np.asarray(self._predict(aux)).flatten()
+            preds[positions] = step_preds
+            prior.update(zip(scale_ids[positions], step_preds))
+
+        return preds
 
     def evaluate(self, y_pred: pd.Series, y_true: pd.Series, metric: str) -> float:
-        return np.mean(generate_metrics(y_true, y_pred, self.model_type_)[metric])
+        aggregator = MetricsAggregator(model_type=self.model_type_, metrics=[metric])
+        return aggregator.update(y_true=y_true, y_pred=y_pred).result()[metric]["avg"]
 
     def save(self) -> None:
         joblib.dump(self, get_models_path("{}.joblib".format(self.__class__.__name__)))
@@ -102,53 +119,464 @@ class Splitter(ABC):
     @abstractmethod
     def split(
         self, df: Union[pd.DataFrame, pd.Series]
-    ) -> List[Tuple[pd.Index, pd.Index]]: ...
+    ) -> List[Tuple[np.ndarray, np.ndarray]]: ...
+
+
+class ExecutionPlan:
+    """Transformers a PipelineStep actually runs and the columns it loads.
+
+    Transformers whose params make them no-ops are skipped. Walking the
+    remaining ones in order, a source column is pruned when it is dropped
+    (Dropper, Selector) or projected away (Cleaner) before anything reads
+    it; renames are followed back to the source column names. A transformer
+    that may read any column stops the pruning there. Dropping steps are
+    told which of their columns were left out at load (see prune), any
+    other missing column still fails them.
+    """
+
+    def __init__(self, transformers: List["Transformer"]) -> None:
+
+        self.steps = [
+            transformer for transformer in transformers if not transformer.is_noop()
+        ]
+        self.projection = None
+        self.pruned_columns = set()
+
+        # (dropping step, {dropped column: its source column}) pairs
+        self.dropped = []
+        sources = {}  # current column name -> source column name
+        read = set()
+        for step in self.steps:
+            columns = step.columns_read()
+            if columns is None:
+                break
+            read |= {sources.get(column, column) for column in columns}
+
+            kept = step.columns_kept()
+            if kept is not None:
+                kept = {sources.get(column, column) for column in kept}
+                self.projection = read | kept
+                break
+
+            pruned = {}
+            for column in step.columns_dropped():
+                source = sources.get(column, column)
+                if source not in read:
+                    self.pruned_columns.add(source)
+                    pruned[column] = source
+            if pruned:
+                self.dropped.append((step, pruned))
+
+            for old, new in step.columns_renamed().items():
+                sources[new] = sources.pop(old, old)
+
+    def usecols(
+        self, columns: List[str], keep: Optional[set] = None
+    ) -> Optional[List[str]]:
+        """Subset of the source columns to load, None when nothing is pruned."""
+        keep = keep or set()
+        if self.projection is not None:
+            selected = [c for c in columns if c in self.projection or c in keep]
+        else:
+            selected = [c for c in columns if c not in self.pruned_columns or c in keep]
+        return selected if len(selected) < len(columns) else None
+
+    def prune(self, skipped: set) -> None:
+        """Tell the dropping steps which of their columns weren't loaded.
+
+        Args:
+            skipped: Source columns of the input left out at load.
+        """
+        for step, pruned in self.dropped:
+            step.prune_columns(
+                {column for column, source in pruned.items() if source in skipped}
+            )
 
 
 class PipelineStep(ABC):
 
+    # used when output_path carries no extension
+    default_output_extension: str = ".parquet"
+    # read specs by input extension, used when a step is given none
+    default_input_specs: dict = {".csv": {"low_memory": False, "encoding": "utf-8"}}
+    # transformers applied in order by transform, set by each step
+    transformers: List["Transformer"] = []
+    inplace: bool = False
+    # outputs are kept under data/<artifacts_dir>, keyed by step fingerprint,
+    # least recently used evicted beyond artifacts_max_bytes
+    cache_artifacts: bool = False
+    artifacts_dir: str = "interim/.artifacts"
+    artifacts_max_bytes: Optional[int] = 10 * 1024**3
+    # digests of input files by (path, mtime, size), shared by every step
+    _file_digests: dict = {}
+    # shrink dtypes of the loaded file, see CSVDataInteractor.load
+    compact_dtypes: bool = False
+    date_columns: List[str] = []
+
     def __init__(
         self,
         output_path: str,
         input_path: str,
-        input_specs: dict,
+        input_specs: Optional[dict],
         input_data: pd.DataFrame,
     ):
         self.di = DataInteractor()
 
         self.output_path = output_path
         self.input_path = input_path
+        if input_specs is None:
+            extension = os.path.splitext(input_path)[1].lower()
+            input_specs = dict(self.default_input_specs.get(extension, {}))
         self.input_specs = input_specs
         self.input_data = input_data
 
+    @property
+    def plan(self) -> ExecutionPlan:
+        return ExecutionPlan(self.transformers)
+
+    def _load_columns(self) -> Optional[List[str]]:
+        plan = self.plan
+        if {"usecols", "columns"} & set(self.input_specs):
+            plan.prune(set())
+            return None
+        parse_dates = self.input_specs.get("parse_dates")
+        columns = self.di.csv.read_columns(self.input_path, self.input_specs)
+        usecols = plan.usecols(
+            columns, keep=set(parse_dates) if isinstance(parse_dates, list) else None
+        )
+        plan.prune(set(columns) - set(usecols or columns))
+        return usecols
+
     def load(self) -> None:
         if self.input_data is not None:
+            self.plan.prune(set())
             self.data = self.input_data
         else:
-            self.data = self.di.static().load(self.input_path, self.input_specs)
+            self.data = self.di.csv.load(
+                self.input_path,
+                self.input_specs,
+                columns=self._load_columns(),
+                compact=self.compact_dtypes,
+                date_columns=self.date_columns,
+            )
+
+    def fit(self) -> None:
+        """Fit every transformer on the loaded data.
+
+        Each transformer is fitted on the output of the ones before it; once
+        fitted, transform applies the learned statistics to any batch.
+        """
+        data = self.data.copy() if self.inplace else self.data
+        for transformer in self.plan.steps:
+            data = transformer.fit(data).transform(data)
+
+    def fit_transform(self) -> None:
+        """Fit every transformer on the loaded data while transforming it."""
+        if self.inplace:
+            self.data = self.data.copy()
+        for transformer in self.plan.steps:
+            self.data = transformer.fit(self.data).transform(self.data)
 
     @abstractmethod
     def transform(self) -> None:
         pass
 
+    def _resolve_output_path(self) -> str:
+        if not os.path.splitext(self.output_path)[1]:
+            self.output_path = self.output_path + self.default_output_extension
+        return self.output_path
+
     def save(self) -> None:
-        self.di.static().write(self.data, self.output_path)
+        self.di.csv.write(self.data, self._resolve_output_path())
         return self.output_path
 
-    def execute(self) -> None:
+    def _file_digest(self, path: str) -> str:
+        full_path = os.path.join(self.di.csv.base_path, path)
+        stat = os.stat(full_path)
+        key = (full_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._file_digests:
+            digest = hashlib.blake2b(digest_size=16)
+            with open(full_path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            self._file_digests[key] = digest.hexdigest()
+        return self._file_digests[key]
+
+    @staticmethod
+    def _code_digest() -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), "*.py"))):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def fingerprint(self, fit: bool = True) -> str:
+        """Digest of the step's input data, params and code.
+
+        Without ``fit`` the transformers' learned statistics are part of it.
+        Two runs with the same fingerprint produce the same output.
+        """
+        if self.input_data is not None:
+            data_digest = hashlib.blake2b(
+                pd.util.hash_pandas_object(self.input_data, index=True).to_numpy(),
+                digest_size=16,
+            ).hexdigest()
+            data_digest += repr(list(self.input_data.dtypes.items()))
+        else:
+            data_digest = self._file_digest(self.input_path)
+
+        content = json.dumps(
+            {
+                "step": self.__class__.__name__,
+                "data": data_digest,
+                "specs": self.input_specs,
+                "compact": [self.compact_dtypes, list(self.date_columns)],
+                "params": getattr(self, "params", {}),
+                "code": self._code_digest(),
+                "fitted": None if fit else joblib.hash(self.plan.steps),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _artifact_path(self, fingerprint: str) -> str:
+        return os.path.join(
+            self.di.csv.base_path,
+            self.artifacts_dir,
+            "{}-{}{}".format(
+                self.__class__.__name__,
+                fingerprint,
+                os.path.splitext(self._resolve_output_path())[1],
+            ),
+        )
+
+    def _evict_artifacts(self, directory: str) -> None:
+        entries = []
+        for name in os.listdir(directory):
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                # evicted by a step running concurrently
+                continue
+            entries.append((stat.st_atime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.artifacts_max_bytes:
+                break
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _reuse_artifact(
+        self, artifact_path: str, output_path: str, fit: bool, load: bool
+    ) -> bool:
+        state_path = artifact_path + ".joblib"
+        if not os.path.exists(artifact_path) or (
+            fit and not os.path.exists(state_path)
+        ):
+            return False
+        if fit:
+            # the transformers end up fitted as by the run that was cached
+            for transformer, fitted in zip(self.transformers, joblib.load(state_path)):
+                transformer.__dict__.update(fitted.__dict__)
+            os.utime(state_path)
+        shutil.copyfile(artifact_path, output_path)
+        os.utime(artifact_path)
+        if load:
+            self.data = self.di.csv.load(self.output_path)
+        return True
+
+    def execute(
+        self,
+        chunksize: Optional[int] = None,
+        force: bool = False,
+        n_jobs: Optional[int] = None,
+        fit: bool = True,
+        cache: Optional[bool] = None,
+    ) -> None:
+        """Run the step, or reuse the cached output of an identical run.
+
+        With ``cache`` (``cache_artifacts`` by default) outputs are cached
+        and ``self.skipped`` tells whether a cached one was used; ``force``
+        always runs the step. ``chunksize`` streams the input and ``n_jobs``
+        shards it over a process pool instead of a single in-memory pass.
+        A reused output is loaded into ``self.data``, except in streaming
+        mode where it may not fit in memory. ``fit`` learns the transformers'
+        statistics on this input, and they stay fitted after the run, reused
+        or not; without it they are applied as already fitted (e.g. by
+        ``fit`` on training data).
+        """
+        self.skipped = False
+        cache = self.cache_artifacts if cache is None else cache
+        output_path = os.path.join(self.di.csv.base_path, self._resolve_output_path())
+        if cache:
+            artifact_path = self._artifact_path(self.fingerprint(fit=fit))
+            if not force and self._reuse_artifact(
+                artifact_path, output_path, fit, load=chunksize is None
+            ):
+                self.skipped = True
+                return
+
+        if chunksize is not None:
+            self.execute_streaming(chunksize, fit=fit)
+        elif n_jobs is not None:
+            self.execute_sharded(n_jobs, fit=fit)
+        else:
+            self.load()
+            if fit:
+                self.fit_transform()
+            else:
+                self.transform()
+            self.save()
+
+        if cache:
+            os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+            shutil.copyfile(output_path, artifact_path)
+            if fit:
+                joblib.dump(self.transformers, artifact_path + ".joblib")
+            if self.artifacts_max_bytes is not None:
+                self._evict_artifacts(os.path.dirname(artifact_path))
+
+    def execute_sharded(self, n_jobs: int, fit: bool = True) -> None:
+        """Run the step over row blocks in ``n_jobs`` worker processes.
+
+        See ShardedExecutor for which transformers can be sharded, and
+        execute for ``fit``.
+        """
         self.load()
-        self.transform()
+        self.data = ShardedExecutor(n_jobs=n_jobs).run(
+            self.plan.steps, self.data, fit=fit
+        )
         self.save()
 
+    def _iter_chunks(self, chunksize: int) -> Iterator[pd.DataFrame]:
+        if self.input_data is not None:
+            self.plan.prune(set())
+            for start in range(0, len(self.input_data), chunksize):
+                yield self.input_data.iloc[start : start + chunksize].copy()
+        else:
+            yield from self.di.csv.iter_load(
+                self.input_path,
+                self.input_specs,
+                chunksize=chunksize,
+                columns=self._load_columns(),
+            )
+
+    def _stream(
+        self, transformers: List["Transformer"], chunksize: int
+    ) -> Iterator[pd.DataFrame]:
+        for transformer in transformers:
+            transformer.start_stream()
+        for chunk in self._iter_chunks(chunksize):
+            for transformer in transformers:
+                chunk = transformer.transform_chunk(chunk)
+            yield chunk
+
+    def execute_streaming(self, chunksize: int, fit: bool = True) -> None:
+        """Run the step over chunks of the input, in bounded memory.
+
+        Row-local transformers run chunk by chunk. Every transformer that
+        needs global statistics first gets its own pass over the stream
+        (transformed by the steps before it) to fit them, and then applies
+        them chunk by chunk in the final pass, which is appended to the
+        output file as it goes. Without ``fit`` the transformers are used
+        as already fitted and only the final pass runs.
+        """
+        transformers = self.plan.steps
+        for transformer in transformers:
+            if not transformer.can_stream():
+                raise ValueError(
+                    "{} needs the whole dataset and cannot run on chunks".format(
+                        transformer.__class__.__name__
+                    )
+                )
+
+        if fit:
+            for transformer in transformers:
+                transformer.reset()
+            for i, transformer in enumerate(transformers):
+                if transformer.needs_fit():
+                    for chunk in self._stream(transformers[:i], chunksize):
+                        transformer.partial_fit(chunk)
+
+        self.di.csv.write_chunks(
+            self._stream(transformers, chunksize), self._resolve_output_path()
+        )
+
 
 class Transformer(ABC):
 
+    inplace: bool = False
+    # whether each row is transformed on its own, so that running on any
+    # partition of the rows (chunks, shards) gives the same result
+    is_row_local_: bool = True
+    # whether transform returns a fresh RangeIndex, so that partitions are
+    # concatenated with ignore_index
+    resets_index_: bool = False
+
     def __init__(self):
         pass
 
+    def _own(self, X):
+        """Return a frame the transformer is allowed to mutate.
+
+        In the default mode the input is copied; in inplace mode the caller
+        hands ownership of X to the transformer and no copy is made.
+        """
+        return X if self.inplace else X.copy()
+
     def fit(self, X, y=None):
+        return self.reset().partial_fit(X, y)
+
+    def partial_fit(self, X, y=None):
+        """Update the fitted statistics with one more batch of rows."""
+        return self
+
+    def reset(self):
+        """Forget the statistics learned by fit / partial_fit."""
         return self
 
+    def needs_fit(self) -> bool:
+        """Whether a stream needs a fitting pass before this transformer."""
+        return False
+
+    def can_stream(self) -> bool:
+        """Whether transform_chunk gives the same result as a whole-data run."""
+        return self.is_row_local_ or self.needs_fit()
+
+    def start_stream(self) -> None:
+        """Called before the first chunk of every pass over a stream."""
+        pass
+
+    def transform_chunk(self, X):
+        return self.transform(X)
+
+    def is_noop(self) -> bool:
+        """Whether transform leaves X untouched with the current params."""
+        return False
+
+    def columns_read(self) -> Optional[set]:
+        """Columns transform reads, or None when it may read any column."""
+        return None
+
+    def columns_kept(self) -> Optional[set]:
+        """Columns transform keeps when it projects X, None otherwise."""
+        return None
+
+    def columns_dropped(self) -> set:
+        return set()
+
+    def columns_renamed(self) -> dict:
+        return {}
+
+    def prune_columns(self, columns: set) -> None:
+        """Called with the columns_dropped the execution plan didn't load."""
+        pass
+
     @abstractmethod
     def transform(self, X):
         pass
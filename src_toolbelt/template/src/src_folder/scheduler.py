@@ -0,0 +1,203 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+from $PROJECT_NAME$.protocols import PipelineStep
+
+
+class PipelineDAG:
+    """Runs PipelineSteps as a dependency graph.
+
+    Steps whose dependencies are done run concurrently in a thread pool
+    (parsing, Arrow IO and most pandas kernels release the GIL, and steps
+    need no pickling). Each step keeps its own DataInteractor, so frames
+    are not shared between steps through its memory cache. A step is only
+    started while the memory estimates of the running steps fit in
+    ``memory_budget``; a step larger than the whole budget runs alone.
+    Outputs are cached, so steps whose inputs didn't change are skipped.
+
+    Example:
+        dag = PipelineDAG.from_dict(
+            {
+                "clean_1": {"step": DataCleaning(...)},
+                "preprocess_1": {
+                    "step": DataPreprocessing(...),
+                    "depends_on": ["clean_1"],
+                },
+                "clean_2": {"step": DataCleaning(...)},
+            },
+            memory_budget=16 * 1024**3,
+        )
+        report = dag.run()
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        memory_budget: Optional[int] = None,
+        memory_factor: float = 3.0,
+    ) -> None:
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.memory_budget = memory_budget
+        self.memory_factor = memory_factor
+        self.steps: Dict[str, PipelineStep] = {}
+        self.dependencies: Dict[str, List[str]] = {}
+        self.memory: Dict[str, Optional[int]] = {}
+
+    @classmethod
+    def from_dict(cls, graph: dict, **kwargs) -> "PipelineDAG":
+
+        dag = cls(**kwargs)
+        for name, node in graph.items():
+            dag.add(
+                name,
+                node["step"],
+                depends_on=node.get("depends_on", []),
+                memory=node.get("memory"),
+            )
+        return dag
+
+    def add(
+        self,
+        name: str,
+        step: PipelineStep,
+        depends_on: Sequence[str] = (),
+        memory: Optional[int] = None,
+    ) -> "PipelineDAG":
+
+        if name in self.steps:
+            raise KeyError("Node {} already in the graph".format(name))
+        self.steps[name] = step
+        self.dependencies[name] = list(depends_on)
+        self.memory[name] = memory
+        return self
+
+    def _validate(self) -> None:
+
+        for name, dependencies in self.dependencies.items():
+            for dependency in dependencies:
+                if dependency not in self.steps:
+                    raise KeyError(
+                        "Node {} depends on unknown node {}".format(name, dependency)
+                    )
+
+        # Kahn's algorithm, only to detect cycles
+        pending = {name: len(deps) for name, deps in self.dependencies.items()}
+        ready = [name for name, count in pending.items() if count == 0]
+        visited = 0
+        while ready:
+            node = ready.pop()
+            visited += 1
+            for name, dependencies in self.dependencies.items():
+                if node in dependencies:
+                    pending[name] -= 1
+                    if pending[name] == 0:
+                        ready.append(name)
+        if visited != len(self.steps):
+            raise ValueError("The pipeline graph has a cycle")
+
+    def _estimate_memory(self, name: str) -> int:
+
+        if self.memory[name] is not None:
+            return self.memory[name]
+
+        step = self.steps[name]
+        if step.input_data is not None:
+            return int(step.input_data.memory_usage(index=True, deep=True).sum())
+        path = os.path.join(step.di.csv.base_path, step.input_path)
+        if os.path.exists(path):
+            return int(os.path.getsize(path) * self.memory_factor)
+        # the input is written by an upstream node
+        return 0
+
+    def _execute(self, name: str, force: bool, chunksize: Optional[int]) -> dict:
+
+        start = time.perf_counter()
+        step = self.steps[name]
+        step.execute(chunksize=chunksize, force=force, cache=True)
+        return {
+            "status": "skipped" if getattr(step, "skipped", False) else "executed",
+            "seconds": time.perf_counter() - start,
+        }
+
+    def run(
+        self, force: Sequence[str] = (), chunksize: Optional[int] = None
+    ) -> Dict[str, dict]:
+        """Execute every node, returning status and wall time per node.
+
+        Args:
+            force: Node names to run even if their cached output is valid,
+                or "all".
+            chunksize: Run the steps in streaming mode.
+
+        Returns:
+            Dict[str, dict]: {"status", "seconds"} per node. A failed node
+            stops its descendants ("cancelled"); the first error is raised
+            once the running nodes have finished.
+        """
+        self._validate()
+
+        report = {}
+        done, failed = set(), set()
+        running, memory_in_use = {}, 0
+        # estimates of the running nodes, self.memory keeps the given ones
+        estimates = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(report) < len(self.steps):
+
+                for name in self.steps:
+                    if name in report or name in running.values():
+                        continue
+                    dependencies = self.dependencies[name]
+                    if any(dependency in failed for dependency in dependencies):
+                        report[name] = {"status": "cancelled", "seconds": 0.0}
+                        failed.add(name)
+                        continue
+                    if not all(dependency in done for dependency in dependencies):
+                        continue
+                    if len(running) >= self.max_workers:
+                        break
+
+                    memory = self._estimate_memory(name)
+                    if (
+                        running
+                        and self.memory_budget is not None
+                        and memory_in_use + memory > self.memory_budget
+                    ):
+                        continue
+
+                    future = executor.submit(
+                        self._execute,
+                        name,
+                        "all" in force or name in force,
+                        chunksize,
+                    )
+                    running[future] = name
+                    estimates[name] = memory
+                    memory_in_use += memory
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    memory_in_use -= estimates.pop(name)
+                    try:
+                        report[name] = future.result()
+                        done.add(name)
+                    except Exception as e:
+                        logging.error("Node {} failed: {}".format(name, e))
+                        report[name] = {"status": "failed", "seconds": float("nan")}
+                        failed.add(name)
+                        error = error or e
+                    logging.info("Node {} {}".format(name, report[name]["status"]))
+
+        if error is not None:
+            raise error
+        return report
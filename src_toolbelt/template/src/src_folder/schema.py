@@ -0,0 +1,141 @@
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_DATETIME = "datetime64[ns]"
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Bytes held by a frame, object columns included."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _compact_dtype(series: pd.Series, category_ratio: float) -> Optional[str]:
+
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(
+        series
+    ):
+        return None
+
+    if pd.api.types.is_integer_dtype(series):
+        if series.empty:
+            return None
+        values = series.to_numpy()
+        low, high = values.min(), values.max()
+        for dtype in ("int8", "int16", "int32"):
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return dtype
+        return None
+
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype="float64")
+        # only when every value survives the round trip
+        if np.array_equal(
+            values.astype("float32").astype("float64"), values, equal_nan=True
+        ):
+            return "float32"
+        return None
+
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        non_null = series.dropna()
+        if pd.api.types.infer_dtype(non_null, skipna=False) != "string":
+            return None
+        if non_null.nunique() <= category_ratio * len(non_null):
+            return "category"
+    return None
+
+
+def infer_schema(
+    df: pd.DataFrame,
+    date_columns: Iterable[str] = (),
+    category_ratio: float = 0.5,
+) -> Dict[str, Optional[str]]:
+    """Smallest lossless dtype per column that can shrink.
+
+    Integers go to the smallest int type holding their range, floats to
+    float32 when no value changes, and string columns whose distinct values
+    are at most ``category_ratio`` of their non-null count to category.
+    ``date_columns`` are parsed as datetimes. Columns that can't shrink map
+    to None.
+    """
+    date_columns = set(date_columns)
+    return {
+        column: (
+            _DATETIME
+            if column in date_columns
+            else _compact_dtype(df[column], category_ratio)
+        )
+        for column in df.columns
+    }
+
+
+def _cast(series: pd.Series, dtype: str) -> Optional[pd.Series]:
+    """The series cast to dtype, None when that would change a value."""
+    if dtype == _DATETIME:
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        try:
+            return pd.to_datetime(series)
+        except (ValueError, TypeError):
+            return None
+    if dtype == "category":
+        return series.astype(dtype)
+    try:
+        cast = series.astype(dtype)
+        # integers out of range wrap around and float32 rounds, silently
+        restored = cast.astype(series.dtype)
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return cast if restored.equals(series) else None
+
+
+def apply_schema(df: pd.DataFrame, schema: Dict[str, Optional[str]]) -> List[str]:
+    """Cast the frame's columns present in ``schema``, in place.
+
+    A cast that would change any value, e.g. to a schema inferred on other
+    rows of the file, is skipped. Returns the skipped columns.
+    """
+    skipped = []
+    for column, dtype in schema.items():
+        if dtype is None or column not in df.columns:
+            continue
+        if str(df[column].dtype) == dtype:
+            continue
+        cast = _cast(df[column], dtype)
+        if cast is None:
+            skipped.append(column)
+        else:
+            df[column] = cast
+    return skipped
+
+
+def schema_path(full_path: str) -> str:
+    return full_path + ".schema.json"
+
+
+def read_schema(full_path: str) -> Dict[str, Optional[str]]:
+    """The saved schema of a file, empty when missing or the file changed."""
+    path = schema_path(full_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        saved = json.load(f)
+    stat = os.stat(full_path)
+    if saved.get("source") != [stat.st_mtime_ns, stat.st_size]:
+        return {}
+    return saved["columns"]
+
+
+def write_schema(full_path: str, schema: Dict[str, Optional[str]]) -> None:
+    stat = os.stat(full_path)
+    with open(schema_path(full_path), "w") as f:
+        json.dump(
+            {"source": [stat.st_mtime_ns, stat.st_size], "columns": schema},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
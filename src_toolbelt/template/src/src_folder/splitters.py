@@ -1,5 +1,6 @@
 from typing import Dict, List, Tuple, Type
 
+import numpy as np
 import pandas as pd
 
 from $PROJECT_NAME$.protocols import Splitter
@@ -21,36 +22,48 @@ class WindowedWeeklySplitter(Splitter):
         self.future_periods = future_periods
         self.max_splits = max_splits
 
-    def split(self, dataset: pd.DataFrame) -> List[Tuple[pd.Index, pd.Index]]:
+    def split(self, dataset: pd.DataFrame) -> List[Tuple[np.ndarray, np.ndarray]]:
 
-        df = dataset.copy()
-        df[self.date_week_col] = pd.to_datetime(df[self.date_week_col]).dt.date
+        dates = (
+            pd.to_datetime(dataset[self.date_week_col])
+            .to_numpy(dtype="datetime64[ns]")
+            .astype("datetime64[D]")
+        )
+
+        # sort once; NaT goes last and never falls inside a window
+        order = np.argsort(dates, kind="stable")
+        sorted_dates = dates[order]
+        is_sorted = bool(np.all(order == np.arange(len(order))))
+        unique_dates = np.unique(sorted_dates[~np.isnat(sorted_dates)])
+        if len(unique_dates) == 0:
+            raise ValueError("No valid dates found in {}".format(self.date_week_col))
+
+        def positions(start: int, stop: int) -> np.ndarray:
+            if is_sorted:
+                return np.arange(start, stop)
+            return np.sort(order[start:stop])
 
         splits = []
         for i in range(self.max_splits):
 
-            df_aux = df[
-                df[self.date_week_col]
-                <= (df[self.date_week_col].max() - pd.DateOffset(weeks=i)).date()
-            ]
+            max_date = unique_dates[-1] - np.timedelta64(7 * i, "D")
+            n_dates = np.searchsorted(unique_dates, max_date, side="right")
+            if n_dates < self.future_periods:
+                raise ValueError(
+                    "Split {} has fewer than {} weeks of data".format(
+                        i, self.future_periods
+                    )
+                )
 
-            ref_max_date = (
-                df_aux[self.date_week_col]
-                .sort_values(ascending=False)
-                .drop_duplicates()
-                .iloc[self.future_periods - 1]
-            )
-            ref_min_date = (
-                ref_max_date - pd.DateOffset(weeks=self.past_periods)
-            ).date()
+            ref_max_date = unique_dates[n_dates - self.future_periods]
+            ref_min_date = ref_max_date - np.timedelta64(7 * self.past_periods, "D")
 
-            train_idx = df_aux[
-                (df_aux[self.date_week_col] >= ref_min_date)
-                & (df_aux[self.date_week_col] < ref_max_date)
-            ].index
-            test_idx = df_aux[df_aux[self.date_week_col] >= ref_max_date].index
+            start, middle = np.searchsorted(
+                sorted_dates, [ref_min_date, ref_max_date], side="left"
+            )
+            stop = np.searchsorted(sorted_dates, max_date, side="right")
 
-            splits.append((train_idx, test_idx))
+            splits.append((positions(start, middle), positions(middle, stop)))
 
         return splits
 
@@ -1,36 +1,130 @@
 import datetime
 import logging
 import sys
+from typing import Optional
 
 import numpy as np
 import pandas as pd
-from unidecode import unidecode
 
-from $PROJECT_NAME$.helper_functions import check_integrity
+from $PROJECT_NAME$.helper_functions import (
+    RowHashSet,
+    check_integrity,
+    duplicated_rows,
+    normalize_texts,
+    row_hashes,
+)
 from $PROJECT_NAME$.protocols import Transformer
 
 
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+def _merge_counts(pieces: list) -> tuple:
+    """Merge (sorted distinct values, counts) pairs into one."""
+    values, inverse = np.unique(
+        np.concatenate([values for values, _ in pieces]), return_inverse=True
+    )
+    counts = np.bincount(
+        inverse, weights=np.concatenate([counts for _, counts in pieces])
+    )
+    return values, counts.astype(np.int64)
+
+
+def _quantiles_from_counts(
+    values: np.ndarray, counts: np.ndarray, quantiles: np.ndarray
+) -> np.ndarray:
+    """Series.quantile of the values repeated counts times, without repeating.
+
+    Same linear interpolation as numpy, so the result is bit for bit the one
+    computed on the full data.
+    """
+    if len(values) == 0:
+        return np.full(len(quantiles), np.nan)
+    ends = np.cumsum(counts)
+    positions = (ends[-1] - 1) * np.asarray(quantiles, dtype=float)
+    below = np.floor(positions)
+    weight = positions - below
+    a = values[np.searchsorted(ends, below, side="right")]
+    above = np.minimum(below + 1, ends[-1] - 1)
+    b = values[np.searchsorted(ends, above, side="right")]
+    return np.where(weight >= 0.5, b - (b - a) * (1 - weight), a + (b - a) * weight)
+
+
+def _passed(condition) -> np.ndarray:
+    return pd.array(condition, dtype="boolean").to_numpy(dtype=bool, na_value=False)
+
+
 class Cleaner(Transformer):
 
+    resets_index_ = True
+
     def __init__(self, variable_columns: list = None, duplicate_columns: list = None):
         check_integrity(variable_columns, list)
         check_integrity(duplicate_columns, list)
         self.variable_columns = variable_columns
         self.duplicate_columns = duplicate_columns
+        self._seen_hashes = None
 
-    def transform(self, X):
-        X = X.copy()[self.variable_columns]
+    @property
+    def is_row_local_(self) -> bool:
+        return not self.duplicate_columns
+
+    def can_stream(self) -> bool:
+        # chunks are deduplicated against the row hashes of the previous ones
+        return True
+
+    def start_stream(self) -> None:
+        self._seen_hashes = RowHashSet()
+
+    def transform_chunk(self, X):
+        if not self.duplicate_columns:
+            return self.transform(X)
+
+        X = self._clean(X)
+        hashes = row_hashes(X, self.duplicate_columns)
+        drop = duplicated_rows(X, self.duplicate_columns, hashes=hashes)
+        drop |= self._seen_hashes.contains(hashes)
+        self._seen_hashes.add(hashes[~drop])
+        return X.loc[~drop].reset_index(drop=True)
+
+    def columns_read(self) -> Optional[set]:
+        return set(self.variable_columns)
+
+    def columns_kept(self) -> Optional[set]:
+        return set(self.variable_columns)
+
+    def _clean(self, X):
+        X = X[self.variable_columns]
         X = X.replace(r"^\s*$", np.nan, regex=True)
-        X = X.map(lambda x: x.strip() if isinstance(x, str) else x)
+        for column in X.columns:
+            if isinstance(X[column].dtype, pd.CategoricalDtype):
+                # mapped once per category; stays categorical unless
+                # stripping merges categories
+                X[column] = X[column].map(_strip)
+            # only columns holding strings need stripping; non-string cells
+            # come back as NaN from the .str accessor and are restored
+            elif pd.api.types.infer_dtype(X[column], skipna=True) in (
+                "string",
+                "mixed",
+                "mixed-integer",
+            ):
+                X[column] = X[column].str.strip().fillna(X[column])
+        return X
+
+    def transform(self, X):
+        X = self._clean(X)
         # drop duplicates if not empty list
         if self.duplicate_columns:
-            X = X.drop_duplicates(subset=self.duplicate_columns)
+            X = X.loc[~duplicated_rows(X, self.duplicate_columns)]
         X = X.reset_index(drop=True)
         return X
 
 
 class Filter(Transformer):
 
+    resets_index_ = True
+
     def __init__(
         self,
         filter_notnull_columns: list = None,
@@ -45,20 +139,52 @@ class Filter(Transformer):
         self.filter_custom_query_columns = filter_custom_query_columns
         self.filter_other_meta = filter_other_meta
 
-    def transform(self, X):
-        X = X.copy()
-        if self.filter_notnull_columns:
-            X = X.loc[pd.notnull(X[self.filter_notnull_columns]).all(1), :]
-        if self.filter_other_meta:
-            X = X.loc[
-                (
-                    X[list(self.filter_other_meta)] == pd.Series(self.filter_other_meta)
-                ).all(axis=1)
-            ]
+    def columns_read(self) -> Optional[set]:
         if self.filter_custom_query_columns:
-            for column in self.filter_custom_query_columns:
-                X = X.query(column)
-        X = X.reset_index(drop=True)
+            return None
+        return set(self.filter_notnull_columns) | set(self.filter_other_meta)
+
+    def _conditions(self, X):
+        """Yield each condition with the mask of the rows passing it."""
+        if self.filter_notnull_columns:
+            yield "notnull({})".format(", ".join(self.filter_notnull_columns)), (
+                X[self.filter_notnull_columns].notna().all(axis=1).to_numpy()
+            )
+        for column, value in self.filter_other_meta.items():
+            yield "{} == {!r}".format(column, value), _passed(X[column] == value)
+        for query in self.filter_custom_query_columns:
+            # pd.eval goes through numexpr when it is installed; queries see
+            # every row, so NA from nullable columns counts as not passing
+            yield query, _passed(X.eval(query))
+
+    def transform(self, X):
+        """Keep the rows passing every condition, with a single take.
+
+        The share of rows passing each condition on its own is kept in
+        ``selectivity_`` for the last call.
+        """
+        mask = np.ones(len(X), dtype=bool)
+        self.selectivity_ = {}
+        for condition, passed in self._conditions(X):
+            self.selectivity_[condition] = float(passed.mean()) if len(X) else 1.0
+            mask &= passed
+
+        if mask.all():
+            X = self._own(X)
+        else:
+            X = X.take(np.flatnonzero(mask))
+        X.reset_index(drop=True, inplace=True)
+        if self.selectivity_:
+            logging.info(
+                "Filter kept {} of {} rows ({})".format(
+                    len(X),
+                    len(mask),
+                    ", ".join(
+                        "{}: {:.1%}".format(condition, share)
+                        for condition, share in self.selectivity_.items()
+                    ),
+                )
+            )
         return X
 
 
@@ -67,10 +193,31 @@ class Dropper(Transformer):
     def __init__(self, drop_columns: list = None):
         check_integrity(drop_columns, list)
         self.drop_columns = drop_columns
+        self.pruned_columns_ = set()
+
+    def is_noop(self) -> bool:
+        return not self.drop_columns
+
+    def columns_read(self) -> Optional[set]:
+        return set()
+
+    def columns_dropped(self) -> set:
+        return set(self.drop_columns)
+
+    def prune_columns(self, columns: set) -> None:
+        self.pruned_columns_ = columns
 
     def transform(self, X):
-        X = X.copy()
-        X = X.drop(columns=self.drop_columns)
+        X = self._own(X)
+        # columns pruned at load by the execution plan are already gone
+        X.drop(
+            columns=[
+                column
+                for column in self.drop_columns
+                if column in X.columns or column not in self.pruned_columns_
+            ],
+            inplace=True,
+        )
         return X
 
 
@@ -80,9 +227,18 @@ class Renamer(Transformer):
         check_integrity(rename_meta, dict)
         self.rename_meta = rename_meta
 
+    def is_noop(self) -> bool:
+        return not self.rename_meta
+
+    def columns_read(self) -> Optional[set]:
+        return set()
+
+    def columns_renamed(self) -> dict:
+        return dict(self.rename_meta)
+
     def transform(self, X):
-        X = X.copy()
-        X = X.rename(columns=self.rename_meta)
+        X = self._own(X)
+        X.rename(columns=self.rename_meta, inplace=True)
         return X
 
 
@@ -100,13 +256,73 @@ class Binner(Transformer):
         self.bins_cut_meta = bins_cut_meta
         self.bins_qcut_meta = bins_qcut_meta
         self.bins_other_meta = bins_other_meta
+        self.reset()
+
+    @property
+    def is_row_local_(self) -> bool:
+        return not self.bins_qcut_meta
+
+    def needs_fit(self) -> bool:
+        return bool(self.bins_qcut_meta)
+
+    def reset(self):
+        # distinct values and their counts per qcut column, in pieces
+        self._qcut_counts = {}
+        self.qcut_edges_ = {}
+        return self
+
+    def fit(self, X, y=None):
+        super().fit(X, y)
+        # keep only the edges, not the values they were computed from
+        for column, q in self.bins_qcut_meta.items():
+            self._qcut_edges(column, q)
+        return self
+
+    def partial_fit(self, X, y=None):
+        if self.qcut_edges_:
+            raise ValueError("Quantile edges already computed, reset before refitting")
+        for column in self.bins_qcut_meta.keys():
+            values = X[column].to_numpy(dtype=float)
+            pieces = self._qcut_counts.setdefault(column, [])
+            pieces.append(np.unique(values[~np.isnan(values)], return_counts=True))
+            # merged once the newer pieces outgrow the merged one, so each
+            # value is merged O(log n) times
+            if sum(len(values) for values, _ in pieces[1:]) >= len(pieces[0][0]):
+                pieces[:] = [_merge_counts(pieces)]
+        return self
+
+    def _qcut_edges(self, column: str, q) -> np.ndarray:
+        if column not in self.qcut_edges_:
+            values, counts = _merge_counts(self._qcut_counts.pop(column))
+            quantiles = np.linspace(0, 1, q + 1) if isinstance(q, int) else q
+            self.qcut_edges_[column] = _quantiles_from_counts(
+                values, counts, quantiles
+            )
+        return self.qcut_edges_[column]
+
+    def is_noop(self) -> bool:
+        return not (self.bins_cut_meta or self.bins_qcut_meta or self.bins_other_meta)
+
+    def columns_read(self) -> Optional[set]:
+        return set(self.bins_cut_meta) | set(self.bins_qcut_meta) | set(
+            self.bins_other_meta
+        )
 
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
         for column, bins in self.bins_cut_meta.items():
             X[column + "_categ"] = pd.cut(X[column], bins=bins, include_lowest=True)
         for column, q in self.bins_qcut_meta.items():
-            X[column + "_categ"] = pd.qcut(X[column], q=q, precision=1)
+            if column in self.qcut_edges_ or column in self._qcut_counts:
+                # same bins pd.qcut builds, from the quantiles seen in fit
+                X[column + "_categ"] = pd.cut(
+                    X[column],
+                    bins=self._qcut_edges(column, q),
+                    precision=1,
+                    include_lowest=True,
+                )
+            else:
+                X[column + "_categ"] = pd.qcut(X[column], q=q, precision=1)
         for var, meta in self.bins_other_meta.items():
             X[meta["var_name"]] = pd.cut(
                 X[var],
@@ -122,18 +338,53 @@ class MinimumPercentageFilter(Transformer):
     def __init__(self, minimum_percentage_meta: dict = None):
         check_integrity(minimum_percentage_meta, dict)
         self.minimum_percentage_meta = minimum_percentage_meta
+        self.reset()
+
+    @property
+    def is_row_local_(self) -> bool:
+        return not self.minimum_percentage_meta
+
+    def needs_fit(self) -> bool:
+        return bool(self.minimum_percentage_meta)
+
+    def reset(self):
+        self.value_counts_ = {}
+        self.notnull_counts_ = {}
+        return self
+
+    def partial_fit(self, X, y=None):
+        for col in self.minimum_percentage_meta.keys():
+            counts = X[col].value_counts()
+            if col in self.value_counts_:
+                counts = self.value_counts_[col].add(counts, fill_value=0)
+            self.value_counts_[col] = counts
+            self.notnull_counts_[col] = (
+                self.notnull_counts_.get(col, 0) + pd.notnull(X[col]).sum()
+            )
+        return self
+
+    def _kept_values(self, X: pd.DataFrame, col: str) -> pd.Index:
+        if col in self.value_counts_:
+            counts, notnull = self.value_counts_[col], self.notnull_counts_[col]
+        else:
+            counts, notnull = X[col].value_counts(), pd.notnull(X[col]).sum()
+        return counts.index[counts > (self.minimum_percentage_meta[col] * notnull)]
+
+    def is_noop(self) -> bool:
+        return not self.minimum_percentage_meta
+
+    def columns_read(self) -> Optional[set]:
+        return set(self.minimum_percentage_meta)
 
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
         if len(self.minimum_percentage_meta) > 0:
             for col in self.minimum_percentage_meta.keys():
-                aux = (X[col].value_counts().index)[
-                    (
-                        X[col].value_counts()
-                        > (self.minimum_percentage_meta[col] * pd.notnull(X[col]).sum())
-                    )
-                ]
-                X[col] = X[col].apply(lambda x: x if x in aux else "other")
+                aux = self._kept_values(X, col)
+                values = X[col]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype(object)
+                X[col] = values.where(values.isin(aux), "other")
         return X
 
 
@@ -142,19 +393,51 @@ class Binarizer(Transformer):
     def __init__(self, binarizer_meta: dict = None):
         check_integrity(binarizer_meta, dict)
         self.binarizer_meta = binarizer_meta
+        self.reset()
+
+    @property
+    def is_row_local_(self) -> bool:
+        return not self.binarizer_meta
+
+    def needs_fit(self) -> bool:
+        return bool(self.binarizer_meta)
+
+    def reset(self):
+        self.categories_ = {}
+        return self
+
+    def partial_fit(self, X, y=None):
+        for column in self.binarizer_meta.keys():
+            seen = list(self.categories_.get(column, []))
+            # only whether there are exactly 2 categories matters
+            self.categories_[column] = pd.Series(
+                seen + list(X[column].unique())
+            ).unique()[:3]
+        return self
+
+    def is_noop(self) -> bool:
+        return not self.binarizer_meta
+
+    def columns_read(self) -> Optional[set]:
+        return set(self.binarizer_meta)
 
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
         for column, element in self.binarizer_meta.items():
-            if len(X[column].unique()) != 2:
+            categories = (
+                self.categories_[column]
+                if column in self.categories_
+                else X[column].unique()
+            )
+            if len(categories) != 2:
                 logging.error(
                     "Cannot binarize a column that does not have exactly 2 categories! Error in {} column".format(
                         column
                     )
                 )
                 sys.exit(1)
-            X["{}_is_{}".format(column, element)] = X[column].apply(
-                lambda x: 1 if x == element else 0
+            X["{}_is_{}".format(column, element)] = (X[column] == element).astype(
+                int
             )
         return X
 
@@ -165,15 +448,25 @@ class Encoder(Transformer):
         check_integrity(encoder_meta, dict)
         self.encoder_meta = encoder_meta
 
+    def is_noop(self) -> bool:
+        return not self.encoder_meta
+
+    def columns_read(self) -> Optional[set]:
+        return set(self.encoder_meta)
+
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
         for var, meta in self.encoder_meta.items():
             if var not in X.columns.values.tolist():
                 pass
-            for unique_elem in X[var].unique().tolist():
-                if unique_elem not in meta.keys():
-                    meta[unique_elem] = unique_elem
-            X[var] = X[var].map(meta)
+            if not meta:
+                continue
+            # values missing from the meta map to themselves, in a Series
+            # rather than a dict so that there is no object per distinct value
+            given = pd.Series(meta)
+            uniques = pd.Series(X[var].unique())
+            kept = uniques[~uniques.isin(given.index)]
+            X[var] = X[var].map(pd.concat([given, pd.Series(kept.array, index=kept)]))
         return X
 
 
@@ -183,9 +476,13 @@ class FeatureTransformer(Transformer):
         check_integrity(transformer_meta, dict)
         self.transformer_meta = transformer_meta
 
+    @property
+    def is_row_local_(self) -> bool:
+        # duplicated flags compare rows with each other
+        return not self.transformer_meta.get("duplicated_flag")
+
     def _duplicated_flag(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
-        X[feature_name] = X[columns].duplicated(keep=False).astype(int)
+        X[feature_name] = duplicated_rows(X, columns, keep=False).astype(int)
         return X
 
     def _no_show_flag(
@@ -205,29 +502,24 @@ class FeatureTransformer(Transformer):
         return X
 
     def _add(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = X[columns[0]] + X[columns[1]]
         return X
 
     def _subtract(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = X[columns[0]] - X[columns[1]]
         return X
 
     def _round(
         self, X: pd.DataFrame, feature_name: str, columns: list, decimals: int = 0
     ):
-        X = X.copy()
         X[feature_name] = np.round(X[columns[0]], decimals=decimals)
         return X
 
     def _floor(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = np.floor(X[columns[0]])
         return X
 
     def _multiply(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         for column in columns:
             if column == columns[0]:
                 X[feature_name] = X[column]
@@ -236,96 +528,72 @@ class FeatureTransformer(Transformer):
         return X
 
     def _divide(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = X[columns[0]] / X[columns[1]]
         return X
 
     def _divide_constant(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = X[columns[0]] / columns[1]
         return X
 
     def _fix_texts(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         if len(columns) == 1:
-            X[feature_name] = X[columns[0]].apply(
-                lambda x: (
-                    "_".join(
-                        unidecode(
-                            x.lower()
-                            .strip()
-                            .replace("%", "pct")
-                            .replace("-", "")
-                            .replace("/", "")
-                            .replace(".", "")
-                        ).split()
-                    )
-                    if pd.notnull(x)
-                    else x
-                )
-            )
+            X[feature_name] = normalize_texts(X[columns[0]])
             return X
 
         for column in columns:
-            X[column] = X[column].apply(
-                lambda x: (
-                    "_".join(
-                        unidecode(
-                            x.lower()
-                            .strip()
-                            .replace("%", "pct")
-                            .replace("-", "")
-                            .replace("/", "")
-                            .replace(".", "")
-                        ).split()
-                    )
-                    if pd.notnull(x)
-                    else x
-                )
-            )
+            X[column] = normalize_texts(X[column])
         return X
 
     def _growth_rate(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = (X[columns[0]] - X[columns[1]]) / X[columns[1]]
         return X
 
     def _date_diff(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         X[feature_name] = np.round((X[columns[0]] - X[columns[1]]).dt.days / 365.25, 1)
         return X
 
     def _calculate_age(
         self, X: pd.DataFrame, feature_name: str, columns: list, n_digits: int = 1
     ):
-        X = X.copy()
         X[feature_name] = np.round(
             (datetime.datetime.now() - X[columns[0]]).dt.days / 365.25, n_digits
         )
         return X
 
     def _date_to_month(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
-        X[feature_name] = pd.to_datetime(X[columns[0]], errors="coerce").apply(
-            lambda x: x.replace(day=1) if pd.notnull(x) else x
-        )
+        dates = pd.to_datetime(X[columns[0]], errors="coerce")
+        X[feature_name] = dates - pd.to_timedelta(dates.dt.day - 1, unit="D")
         return X
 
     def _fix_zipcodes(self, X: pd.DataFrame, feature_name: str, columns: list):
-        X = X.copy()
         for column in columns:
-            X[column] = X[column].apply(lambda x: x.replace(" ", "").replace("-", ""))
+            X[column] = (
+                X[column]
+                .str.replace(" ", "", regex=False)
+                .str.replace("-", "", regex=False)
+            )
         return X
 
     def _inequality_flag(
         self, X: pd.DataFrame, feature_name: str, columns: list, threshold: int
     ):
-        X = X.copy()
-        X[feature_name] = X[columns[0]].apply(lambda x: 1 if x < threshold else 0)
+        X[feature_name] = (X[columns[0]] < threshold).astype(int)
         return X
 
+    def is_noop(self) -> bool:
+        return not any(self.transformer_meta.values())
+
+    def columns_read(self) -> Optional[set]:
+        return {
+            column
+            for metas in self.transformer_meta.values()
+            for meta in metas.values()
+            for column in meta["columns"]
+            if isinstance(column, str)
+        }
+
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
         for name, iter in self.transformer_meta.items():
             transformation = getattr(self, "_{}".format(name))
             for meta in iter.values():
@@ -346,10 +614,13 @@ class CustomTransformer(Transformer):
 
     def _transform_v0(self, X: pd.DataFrame):
 
-        df = X.copy()
+        df = self._own(X)
 
         return df
 
+    def is_noop(self) -> bool:
+        return not hasattr(self, "_transform_{}".format(self.custom_transformer_name))
+
     def transform(self, X: pd.DataFrame):
 
         if hasattr(self, "_transform_{}".format(self.custom_transformer_name)):
@@ -381,8 +652,22 @@ class MissingInputer(Transformer):
         self.other_missing_meta = other_missing_meta
         self.default_fill_meta = default_fill_meta
 
+    def is_noop(self) -> bool:
+        return not (
+            self.default_numerical_missing_columns
+            or self.default_categorical_missing_columns
+            or self.other_missing_meta
+        )
+
+    def columns_read(self) -> Optional[set]:
+        return (
+            set(self.default_numerical_missing_columns)
+            | set(self.default_categorical_missing_columns)
+            | set(self.other_missing_meta)
+        )
+
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
         if len(self.default_numerical_missing_columns) > 0:
             X[self.default_numerical_missing_columns] = X[
                 self.default_numerical_missing_columns
@@ -411,58 +696,228 @@ class Selector(Transformer):
     def __init__(self, selection_drop_columns):
         check_integrity(selection_drop_columns, list)
         self.selection_drop_columns = selection_drop_columns
+        self.pruned_columns_ = set()
+
+    def is_noop(self) -> bool:
+        return not self.selection_drop_columns
+
+    def columns_read(self) -> Optional[set]:
+        return set()
+
+    def columns_dropped(self) -> set:
+        return set(self.selection_drop_columns)
+
+    def prune_columns(self, columns: set) -> None:
+        self.pruned_columns_ = columns
 
     def transform(self, X):
-        X = X.copy()
-        X = X.drop(columns=self.selection_drop_columns)
+        X = self._own(X)
+        # columns pruned at load by the execution plan are already gone
+        X.drop(
+            columns=[
+                column
+                for column in self.selection_drop_columns
+                if column in X.columns or column not in self.pruned_columns_
+            ],
+            inplace=True,
+        )
         return X
 
 
 class Dumminizer(Transformer):
 
-    def __init__(self, dummies_columns):
+    def __init__(self, dummies_columns, sparse: bool = False):
         check_integrity(dummies_columns, list)
         self.dummies_columns = dummies_columns
+        # zero-filled sparse dummy columns, see helper_functions.to_csr
+        self.sparse = sparse
+        self.reset()
+
+    @property
+    def is_row_local_(self) -> bool:
+        # the dummy columns depend on the categories present in X
+        return not self.dummies_columns
+
+    def needs_fit(self) -> bool:
+        return bool(self.dummies_columns)
+
+    def reset(self):
+        self.categories_ = {}
+        return self
+
+    def partial_fit(self, X, y=None):
+        for column in self.dummies_columns:
+            if isinstance(X[column].dtype, pd.CategoricalDtype):
+                categories = X[column].cat.categories
+            else:
+                categories = pd.Index(X[column].dropna().unique()).sort_values()
+            if column in self.categories_:
+                categories = self.categories_[column].union(categories)
+            self.categories_[column] = categories
+        return self
+
+    def is_noop(self) -> bool:
+        return not self.dummies_columns
+
+    def columns_read(self) -> Optional[set]:
+        return set(self.dummies_columns)
 
     def transform(self, X):
-        X = X.copy()
-        X = pd.get_dummies(X, columns=self.dummies_columns)
+        if self.categories_:
+            # fixed categories give the same dummy columns on any batch
+            X = self._own(X)
+            for column in self.dummies_columns:
+                X[column] = pd.Categorical(
+                    X[column], categories=self.categories_[column]
+                )
+        X = pd.get_dummies(X, columns=self.dummies_columns, sparse=self.sparse)
         return X
 
 
 class Scaler(Transformer):
+    """Affine scalers, applied as ``(X - center) / spread * width + low``.
+
+    Each scaler turns column statistics (count, mean, M2, min, max) into its
+    (center, spread, width, low). The statistics are either learned in fit
+    or, when not fitted, computed on the data given to transform. Sparse
+    columns only take scalers that keep 0 at 0 (e.g. minmax over 0/1
+    dummies); any other raises ValueError.
+    """
 
     def __init__(self, scale_meta: dict = None):
         check_integrity(scale_meta, dict)
         self.scale_meta = scale_meta
+        self.reset()
+
+    @property
+    def is_row_local_(self) -> bool:
+        return not self.scale_meta
+
+    def needs_fit(self) -> bool:
+        return bool(self.scale_meta)
+
+    def reset(self):
+        self.column_stats_ = {}
+        return self
+
+    def partial_fit(self, X, y=None):
+        columns = {col for meta in self.scale_meta.values() for col in meta["columns"]}
+        for col in columns:
+            self.column_stats_[col] = self._merge_stats(
+                self.column_stats_.get(col), self._batch_stats(X[col])
+            )
+        return self
+
+    @staticmethod
+    def _batch_stats(X: pd.Series) -> dict:
+        values = X.dropna()
+        if pd.api.types.is_bool_dtype(values.dtype):
+            # dummy columns; sparse ones stay sparse
+            values = values.astype(
+                pd.SparseDtype(float, 0.0)
+                if isinstance(values.dtype, pd.SparseDtype)
+                else float
+            )
+        count = len(values)
+        mean = values.mean() if count > 0 else 0.0
+        return {
+            "count": count,
+            "mean": mean,
+            "m2": ((values - mean) ** 2).sum(),
+            "min": values.min() if count > 0 else np.nan,
+            "max": values.max() if count > 0 else np.nan,
+        }
+
+    @staticmethod
+    def _merge_stats(a: dict, b: dict) -> dict:
+        if a is None:
+            return b
+        count = a["count"] + b["count"]
+        if count == 0:
+            return a
+        delta = b["mean"] - a["mean"]
+        return {
+            "count": count,
+            "mean": a["mean"] + delta * b["count"] / count,
+            "m2": a["m2"] + b["m2"] + delta**2 * a["count"] * b["count"] / count,
+            "min": np.fmin(a["min"], b["min"]),
+            "max": np.fmax(a["max"], b["max"]),
+        }
+
+    @staticmethod
+    def _affine_stats(stats: dict, scale: float, offset: float) -> dict:
+        bounds = sorted([stats["min"] * scale + offset, stats["max"] * scale + offset])
+        return {
+            "count": stats["count"],
+            "mean": stats["mean"] * scale + offset,
+            "m2": stats["m2"] * scale**2,
+            "min": bounds[0],
+            "max": bounds[1],
+        }
+
+    def is_noop(self) -> bool:
+        return not self.scale_meta
+
+    def columns_read(self) -> Optional[set]:
+        return {col for meta in self.scale_meta.values() for col in meta["columns"]}
 
     def transform(self, X):
-        X = X.copy()
+        X = self._own(X)
+        # fitted statistics follow the columns through the chained scalers
+        fitted_stats = dict(self.column_stats_)
+
+        def stats(columns):
+            merged = None
+            for col in columns:
+                col_stats = (
+                    fitted_stats[col]
+                    if col in fitted_stats
+                    else self._batch_stats(X[col])
+                )
+                merged = self._merge_stats(merged, col_stats)
+            return merged
+
         for scaler_name, meta in self.scale_meta.items():
 
             scaler = getattr(self, "_{}".format(scaler_name))
 
             if "_multiple_columns" in scaler_name:
-                X[meta["columns"]] = scaler(X=X[meta["columns"]], **meta["params"])
+                groups = [meta["columns"]]
+            else:
+                groups = [[col] for col in meta["columns"]]
 
-            for col in meta["columns"]:
-                X[col] = scaler(X=X[col], **meta["params"])
+            for columns in groups:
+                center, spread, width, low = scaler(stats(columns), **meta["params"])
+                sparse = [
+                    col for col in columns if isinstance(X[col].dtype, pd.SparseDtype)
+                ]
+                # a shifted fill value makes every row of the column stored
+                if sparse and (0 - center) / spread * width + low != 0:
+                    raise ValueError(
+                        "Scaler {} shifts the sparse columns {}, use dense "
+                        "dummies or a scaler mapping 0 to 0".format(
+                            scaler_name, sparse
+                        )
+                    )
+                # same operations as the whole-data formulas, so that e.g.
+                # the maximum maps to exactly v_max
+                X[columns] = (X[columns] - center) / spread * width + low
+                scale = width / spread
+                for col in columns:
+                    if col in fitted_stats:
+                        fitted_stats[col] = self._affine_stats(
+                            fitted_stats[col], scale, low - center * scale
+                        )
 
         return X
 
-    def _minmax(self, X: pd.Series, v_min: float = 0, v_max: float = 1):
-        X = X.copy()
-        return (X - X.min()) / (X.max() - X.min()) * (v_max - v_min) + v_min
+    def _minmax(self, stats: dict, v_min: float = 0, v_max: float = 1):
+        return stats["min"], stats["max"] - stats["min"], v_max - v_min, v_min
 
-    def _standard(self, X: pd.Series):
-        X = X.copy()
-        return (X - X.mean()) / X.std()
+    def _standard(self, stats: dict):
+        return stats["mean"], np.sqrt(stats["m2"] / (stats["count"] - 1)), 1, 0
 
     def _minmax_multiple_columns(
-        self, X: pd.DataFrame, v_min: float = 0, v_max: float = 1
+        self, stats: dict, v_min: float = 0, v_max: float = 1
     ):
-        X_ = X.copy()
-        X_ = (X_ - X_.min().min()) / (X_.max().max() - X_.min().min()) * (
-            v_max - v_min
-        ) + v_min
-        return X_
+        return self._minmax(stats, v_min=v_min, v_max=v_max)
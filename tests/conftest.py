@@ -0,0 +1,72 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+import yaml
+
+from src_toolbelt.create_project import copytree, edit_metadata
+
+PROJECT_NAME = "toolbelt_project"
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "src_toolbelt",
+    "template",
+)
+
+_RENDERED = {}
+
+
+def render_template(destination: str) -> str:
+    """Render the template into destination like init_project does.
+
+    Returns the directory to put on sys.path to import the project.
+    """
+    copytree(TEMPLATE_PATH, destination, ignore=shutil.ignore_patterns("__pycache__"))
+    os.rename(
+        os.path.join(destination, "src", "src_folder"),
+        os.path.join(destination, "src", PROJECT_NAME),
+    )
+    translate_dict = {
+        "$PROJECT_NAME$": PROJECT_NAME,
+        "$PROJECT_VERSION$": "0.0.1",
+        "$PROJECT_AUTHOR$": "tests",
+        "$PROJECT_EMAIL$": "",
+        "$PROJECT_DESCRIPTION$": "",
+    }
+    for root, _, files in os.walk(destination):
+        for file in files:
+            edit_metadata(os.path.join(root, file), translate_dict)
+    return os.path.join(destination, "src")
+
+
+def pytest_configure(config):
+    # rendered before collection, so test modules import the project directly
+    _RENDERED["root"] = tempfile.mkdtemp(prefix="toolbelt-")
+    sys.path.insert(0, render_template(_RENDERED["root"]))
+
+
+def pytest_unconfigure(config):
+    if "root" in _RENDERED:
+        shutil.rmtree(_RENDERED.pop("root"), ignore_errors=True)
+
+
+@pytest.fixture
+def data_path():
+    """data/ folder of the rendered project."""
+    return os.path.join(_RENDERED["root"], "data")
+
+
+@pytest.fixture
+def write_params(data_path):
+    """Write a params file under data/params/tests, returning its data path."""
+
+    def write(name: str, params: dict) -> str:
+        path = os.path.join("params", "tests", "{}.yaml".format(name))
+        os.makedirs(os.path.join(data_path, "params", "tests"), exist_ok=True)
+        with open(os.path.join(data_path, path), "w") as f:
+            yaml.safe_dump(params, f)
+        return path
+
+    return write
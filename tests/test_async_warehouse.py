@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from toolbelt_project.data_interactor import AsyncBigQueryDataInteractor
+
+
+class FakeJob:
+    job_id = "fake"
+
+    def __init__(self, seconds: float):
+        self.finish_at = time.monotonic() + seconds
+        self.cancelled = threading.Event()
+        self.cancel_thread = None
+
+    def done(self):
+        return self.cancelled.is_set() or time.monotonic() >= self.finish_at
+
+    def to_dataframe(self):
+        return pd.DataFrame({"x": [1]})
+
+    def cancel(self):
+        self.cancel_thread = threading.current_thread()
+        self.cancelled.set()
+        return True
+
+
+class FakeClient:
+    def __init__(self, submit_seconds: float, run_seconds: float):
+        self.submit_seconds = submit_seconds
+        self.run_seconds = run_seconds
+        self.jobs = []
+
+    def query(self, query, project=None):
+        time.sleep(self.submit_seconds)
+        job = FakeJob(self.run_seconds)
+        self.jobs.append(job)
+        return job
+
+
+def interactor(client):
+    return AsyncBigQueryDataInteractor(
+        client=client, project_id="project", poll_interval=0.01
+    )
+
+
+def test_query_result():
+    client = FakeClient(submit_seconds=0, run_seconds=0.02)
+    df = asyncio.run(interactor(client).run_str_query("SELECT 1"))
+    assert df["x"].tolist() == [1]
+
+
+@pytest.mark.parametrize("submit_seconds, run_seconds", [(0, 10), (0.2, 10)])
+def test_timeout_cancels_the_job(submit_seconds, run_seconds):
+    client = FakeClient(submit_seconds, run_seconds)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await interactor(client).run_str_query("SELECT 1", timeout=0.05)
+        # a job still being submitted at the timeout is cancelled once created
+        await asyncio.sleep(submit_seconds + 0.1)
+
+    asyncio.run(run())
+    assert len(client.jobs) == 1
+    job = client.jobs[0]
+    assert job.cancelled.wait(1)
+    assert job.cancel_thread is not threading.main_thread()
@@ -0,0 +1,83 @@
+"""Timings of the vectorized code paths against the ones they replaced.
+
+Each benchmark prints its timings (see them with ``pytest -s``) and only
+asserts that the new path is faster, with a margin wide enough for noisy
+machines.
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from test_splitters import old_split, weekly_frame
+from test_transformers_equivalence import (
+    old_binarizer,
+    old_cleaner,
+    old_minimum_percentage_filter,
+)
+
+from toolbelt_project.splitters import WindowedWeeklySplitter
+from toolbelt_project.transformers import Binarizer, Cleaner, MinimumPercentageFilter
+
+
+def best_time(func, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(name: str, old: float, new: float) -> None:
+    print("\n{}: {:.4f}s -> {:.4f}s ({:.1f}x)".format(name, old, new, old / new))
+
+
+def test_transformers_benchmark():
+    rng = np.random.default_rng(0)
+    n = 200_000
+    words = np.array([" ana", "bob ", "carl", "  ", "dora", None], dtype=object)
+    X = pd.DataFrame(
+        {
+            "name": words[rng.integers(0, len(words), n)],
+            "city": words[rng.integers(0, len(words), n)],
+            "number": rng.integers(0, 10, n),
+            "flag": np.where(rng.random(n) < 0.5, "yes", "no"),
+        }
+    )
+    columns = ["name", "city", "number"]
+
+    old = best_time(lambda: old_cleaner(X, columns, ["name"]))
+    new = best_time(lambda: Cleaner(columns, ["name"]).transform(X))
+    report("Cleaner", old, new)
+    assert new < old
+
+    meta = {"name": 0.2, "number": 0.15}
+    old = best_time(lambda: old_minimum_percentage_filter(X, meta))
+    new = best_time(lambda: MinimumPercentageFilter(meta).transform(X))
+    report("MinimumPercentageFilter", old, new)
+    assert new < old
+
+    old = best_time(lambda: old_binarizer(X, {"flag": "yes"}))
+    new = best_time(lambda: Binarizer({"flag": "yes"}).transform(X))
+    report("Binarizer", old, new)
+    assert new < old
+
+
+def test_splitter_scaling_benchmark():
+    X = weekly_frame(100_000, 100, shuffle=True)
+
+    timings = {}
+    for max_splits in (2, 16):
+        splitter = WindowedWeeklySplitter("week", 12, 4, max_splits)
+        old = best_time(lambda: old_split(X, "week", 12, 4, max_splits), repeat=1)
+        new = best_time(lambda: splitter.split(X), repeat=1)
+        report("WindowedWeeklySplitter, {} splits".format(max_splits), old, new)
+        timings[max_splits] = (old, new)
+        assert new < old
+
+    # every extra split used to refilter and resort the dataset; now it only
+    # adds searchsorted lookups and the positions of its rows
+    old_growth = timings[16][0] / timings[2][0]
+    new_growth = timings[16][1] / timings[2][1]
+    assert new_growth < old_growth
@@ -0,0 +1,357 @@
+import datetime
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from toolbelt_project.data_interactor import (
+    BigQueryDataInteractor,
+    CachedWarehouseDataInteractor,
+    DataInteractor,
+    WarehouseDataInteractor,
+    has_top_level_order_by,
+    is_cacheable,
+)
+
+SCHEMA = pa.schema([("id", pa.int64()), ("name", pa.string())])
+
+
+def canned_batches(n_rows, batch_rows):
+    return [
+        pa.RecordBatch.from_pydict(
+            {
+                "id": list(range(start, min(start + batch_rows, n_rows))),
+                "name": [
+                    "row {}".format(i)
+                    for i in range(start, min(start + batch_rows, n_rows))
+                ],
+            },
+            schema=SCHEMA,
+        )
+        for start in range(0, n_rows, batch_rows)
+    ]
+
+
+class FakeQueryJob:
+    destination = SimpleNamespace(
+        project="project", dataset_id="_anonymous", table_id="result"
+    )
+
+    def result(self):
+        return self
+
+
+class FakeClient:
+    def __init__(self):
+        self.queries = []
+
+    def query(self, query, project=None):
+        self.queries.append(query)
+        return FakeQueryJob()
+
+
+class FakeReader:
+    def __init__(self, batches, delay):
+        self.batches = batches
+        self.delay = delay
+
+    def rows(self, session):
+        return SimpleNamespace(pages=self._pages())
+
+    def _pages(self):
+        for batch in self.batches:
+            time.sleep(self.delay)
+            yield SimpleNamespace(to_arrow=lambda batch=batch: batch)
+
+
+class FakeReadClient:
+    """Serves canned batches dealt round-robin over the requested streams.
+
+    The first stream is the slowest, so with several streams its batches
+    arrive after those of the others.
+    """
+
+    def __init__(self, batches, fail_stream=None):
+        self.batches = batches
+        self.fail_stream = fail_stream
+        self.max_stream_counts = []
+        self.read_streams = []
+
+    def create_read_session(self, parent, read_session, max_stream_count):
+        self.max_stream_counts.append(max_stream_count)
+        n_streams = min(max_stream_count, len(self.batches))
+        return SimpleNamespace(
+            streams=[
+                SimpleNamespace(name="stream-{}".format(i)) for i in range(n_streams)
+            ],
+            arrow_schema=SimpleNamespace(
+                serialized_schema=SCHEMA.serialize().to_pybytes()
+            ),
+        )
+
+    def read_rows(self, stream_name):
+        self.read_streams.append(stream_name)
+        if stream_name == self.fail_stream:
+            raise RuntimeError("stream failed")
+        streams = max(self.max_stream_counts[-1], 1)
+        i = int(stream_name.split("-")[1])
+        return FakeReader(
+            self.batches[i::streams], delay=0.05 if i == 0 and streams > 1 else 0
+        )
+
+
+def interactor(read_client, max_streams=4):
+    return BigQueryDataInteractor(
+        client=FakeClient(),
+        read_client=read_client,
+        project_id="project",
+        max_streams=max_streams,
+    )
+
+
+def test_query_to_arrow_reads_every_stream():
+    batches = canned_batches(100, 10)
+    read_client = FakeReadClient(batches)
+    table = interactor(read_client).query_to_arrow("SELECT * FROM t")
+
+    assert read_client.max_stream_counts == [4]
+    assert len(set(read_client.read_streams)) == 4
+    assert table.schema == SCHEMA
+    assert sorted(table["id"].to_pylist()) == list(range(100))
+
+
+def test_query_to_pandas_uses_arrow_dtypes():
+    df = interactor(FakeReadClient(canned_batches(5, 2))).query_to_pandas(
+        "SELECT * FROM t"
+    )
+    assert isinstance(df["id"].dtype, pd.ArrowDtype)
+    assert sorted(df["id"].tolist()) == list(range(5))
+
+
+@pytest.mark.parametrize(
+    "query, preserve_order, streams",
+    [
+        ("SELECT * FROM t ORDER BY id", None, 1),
+        ("select *\nfrom t\norder  by id -- sorted\n;", None, 1),
+        ("SELECT * FROM t", True, 1),
+        ("SELECT * FROM t ORDER BY id", False, 4),
+        ("SELECT * FROM (SELECT * FROM t ORDER BY id)", None, 4),
+        ("SELECT ROW_NUMBER() OVER (ORDER BY id) AS n FROM t", None, 4),
+        ("SELECT 'order by' AS s FROM t", None, 4),
+    ],
+)
+def test_ordered_queries_read_a_single_stream(query, preserve_order, streams):
+    batches = canned_batches(100, 10)
+    read_client = FakeReadClient(batches)
+    table = interactor(read_client).query_to_arrow(query, preserve_order=preserve_order)
+
+    assert read_client.max_stream_counts == [streams]
+    ids = table["id"].to_pylist()
+    assert sorted(ids) == list(range(100))
+    # several streams interleave, the slow first one arriving last
+    assert (ids == list(range(100))) == (streams == 1)
+
+
+def test_has_top_level_order_by():
+    assert has_top_level_order_by("WITH a AS (SELECT 1) SELECT * FROM a ORDER BY 1")
+    assert not has_top_level_order_by("SELECT `order` FROM t")
+    assert not has_top_level_order_by('SELECT "x ORDER BY y" FROM t')
+
+
+def test_query_to_parquet(data_path):
+    n_rows = interactor(FakeReadClient(canned_batches(100, 10))).query_to_parquet(
+        "SELECT * FROM t ORDER BY id", "interim/bigquery_result.parquet"
+    )
+    table = pq.read_table(os.path.join(data_path, "interim/bigquery_result.parquet"))
+
+    assert n_rows == 100
+    assert table["id"].to_pylist() == list(range(100))
+
+
+def test_failed_stream_raises_and_leaves_no_file(data_path):
+    read_client = FakeReadClient(canned_batches(100, 10), fail_stream="stream-2")
+    with pytest.raises(RuntimeError, match="stream failed"):
+        interactor(read_client).query_to_parquet(
+            "SELECT * FROM t", "interim/bigquery_failed.parquet"
+        )
+    assert not [
+        name
+        for name in os.listdir(os.path.join(data_path, "interim"))
+        if name.startswith("bigquery_failed")
+    ]
+
+
+class StubWarehouse(WarehouseDataInteractor):
+    project_id = "project"
+
+    def __init__(self):
+        self.queries = []
+
+    def run_str_query(self, query, **kwargs):
+        self.queries.append(query)
+        return pd.DataFrame(
+            {
+                "day": pd.Series(
+                    [datetime.date(2024, 1, 1), None, datetime.date(2024, 3, 1)],
+                    dtype="dbdate",
+                ),
+                "at": pd.Series(
+                    [datetime.time(10, 30), datetime.time(0, 0), None],
+                    dtype="dbtime",
+                ),
+                "n": pd.array([1, None, 3], dtype="Int64"),
+                "flag": pd.array([True, None, False], dtype="boolean"),
+                "name": pd.Series(["a", None, "c"], dtype=object),
+                "ts": pd.to_datetime(
+                    ["2024-01-01 10:00", None, "2024-01-02 00:00"], utc=True
+                ),
+                "x": [0.5, np.nan, 2.0],
+            }
+        )
+
+
+@pytest.fixture
+def cached(tmp_path):
+    warehouse = StubWarehouse()
+    return warehouse, CachedWarehouseDataInteractor(
+        warehouse, cache_dir=str(tmp_path / "query_cache")
+    )
+
+
+def test_query_cache_restores_dtypes(cached):
+    warehouse, cache = cached
+    first = cache.run_str_query("SELECT * FROM t")
+    second = cache.run_str_query("SELECT *\n  FROM t -- same query\n")
+
+    assert len(warehouse.queries) == 1
+    assert cache.cache_stats["hits"] == 1
+    pd.testing.assert_frame_equal(second, first)
+    assert second["name"].tolist() == ["a", None, "c"]
+
+
+def test_query_cache_refresh_and_project(cached):
+    warehouse, cache = cached
+    cache.run_str_query("SELECT * FROM t")
+    cache.run_str_query("SELECT * FROM t", refresh=True)
+    warehouse.project_id = "other"
+    cache.run_str_query("SELECT * FROM t")
+    assert len(warehouse.queries) == 3
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "CREATE TABLE d.t AS SELECT 1 AS x",
+        "INSERT INTO d.t SELECT 1",
+        "DELETE FROM d.t WHERE TRUE",
+        "SELECT CURRENT_DATE() AS today",
+        "SELECT * FROM t WHERE rand() < 0.1",
+        "DECLARE x INT64 DEFAULT 1; SELECT x",
+    ],
+)
+def test_query_cache_always_runs_other_statements(cached, query):
+    warehouse, cache = cached
+    cache.run_str_query(query)
+    cache.run_str_query(query)
+    assert len(warehouse.queries) == 2
+    assert not is_cacheable(query)
+
+
+def test_is_cacheable():
+    assert is_cacheable("WITH a AS (SELECT 1) SELECT * FROM a")
+    assert is_cacheable("-- report\n(SELECT 1) UNION ALL (SELECT 2)")
+    assert is_cacheable("SELECT 'rand()' AS s, `current_date` FROM t")
+
+
+def test_data_interactor_caches_queries_on_request():
+    assert isinstance(DataInteractor().bigquery, BigQueryDataInteractor)
+    assert isinstance(
+        DataInteractor(cache_queries=True).bigquery, CachedWarehouseDataInteractor
+    )
+
+
+class FakeLoadClient:
+    def __init__(self, fail_after=None):
+        self.loads = []
+        self.fail_after = fail_after
+        self.lock = threading.Lock()
+
+    def load_table_from_file(self, buffer, destination, job_config):
+        table = pq.read_table(buffer)
+        with self.lock:
+            if self.fail_after is not None and len(self.loads) >= self.fail_after:
+                raise RuntimeError("load failed")
+            self.loads.append((destination, job_config, table))
+        return SimpleNamespace(result=lambda: None)
+
+
+def insert(client, df, **kwargs):
+    return BigQueryDataInteractor(client=client, project_id="project").insert_table(
+        df, "table", "dataset", "project", **kwargs
+    )
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "id": range(10),
+            "price": np.linspace(0, 1, 10),
+            "empty": pd.Series([None] * 10, dtype=object),
+        }
+    )
+
+
+def test_insert_table_loads_parquet_chunks(frame):
+    client = FakeLoadClient()
+    stats = insert(client, frame, chunksize=3, if_exists="append")
+
+    assert stats["rows"] == 10 and stats["jobs"] == 4
+    assert {destination for destination, _, _ in client.loads} == {
+        "project.dataset.table"
+    }
+    dispositions = [config.write_disposition for _, config, _ in client.loads]
+    assert dispositions == ["WRITE_APPEND"] * 4
+    assert all(config.source_format == "PARQUET" for _, config, _ in client.loads)
+    loaded = pa.concat_tables([table for _, _, table in client.loads])
+    assert sorted(loaded["id"].to_pylist()) == list(range(10))
+
+
+def test_insert_table_first_chunk_applies_if_exists(frame):
+    client = FakeLoadClient()
+    insert(client, frame, chunksize=4)
+    dispositions = [config.write_disposition for _, config, _ in client.loads]
+    assert dispositions[0] == "WRITE_TRUNCATE"
+    assert dispositions[1:] == ["WRITE_APPEND"] * 2
+
+
+def test_insert_table_loads_all_null_columns_as_strings(frame):
+    client = FakeLoadClient()
+    insert(client, frame)
+    _, config, table = client.loads[0]
+    assert table.schema.field("empty").type == pa.string()
+    assert config.schema is None
+
+
+def test_insert_table_merges_a_partial_schema(frame):
+    client = FakeLoadClient()
+    insert(client, frame, table_schema=[{"name": "price", "type": "NUMERIC"}])
+    _, config, _ = client.loads[0]
+    assert [(field.name, field.field_type) for field in config.schema] == [
+        ("id", "INTEGER"),
+        ("price", "NUMERIC"),
+        ("empty", "STRING"),
+    ]
+
+
+def test_insert_table_errors(frame):
+    with pytest.raises(ValueError, match="if_exists"):
+        insert(FakeLoadClient(), frame, if_exists="truncate")
+    with pytest.raises(RuntimeError, match="load failed"):
+        insert(FakeLoadClient(fail_after=1), frame, chunksize=3)
@@ -0,0 +1,177 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from toolbelt_project.data_interactor import (
+    CSVDataInteractor,
+    YAMLDataInteractor,
+    thaw,
+)
+from toolbelt_project.pipelines import DataPreprocessing
+from toolbelt_project.transformers import Encoder
+
+
+@pytest.fixture
+def csv_di(tmp_path):
+    return CSVDataInteractor(
+        base_path=str(tmp_path), disk_cache_dir=str(tmp_path / ".cache")
+    )
+
+
+PREPROCESSING_PARAMS = {
+    "drop_columns": [],
+    "rename_meta": {},
+    "bins_cut_meta": {"x": [0, 2, 4]},
+    "bins_qcut_meta": {"y": 2},
+    "bins_other_meta": {},
+    "minimum_percentage_meta": {},
+    "binarizer_meta": {},
+    "encoder_meta": {},
+    "transformer_meta": {},
+    "custom_transformer_name": "",
+    "default_numerical_missing_columns": [],
+    "default_categorical_missing_columns": [],
+    "other_missing_meta": {},
+    "default_fill_meta": {},
+}
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".feather"])
+def test_step_reads_any_format_with_default_specs(data_path, write_params, extension):
+    params_path = write_params("preprocessing_formats", PREPROCESSING_PARAMS)
+    input_path = "raw/formats{}".format(extension)
+    CSVDataInteractor().write(
+        pd.DataFrame({"x": [0.5, 1.5, 2.5, 3.5], "y": [1, 2, 3, 4]}), input_path
+    )
+
+    step = DataPreprocessing(
+        output_path="processed/formats{}".format(extension),
+        params_path=params_path,
+        input_path=input_path,
+    )
+    step.execute(force=True)
+
+    output = step.di.csv.load(step.output_path, refresh=True)
+    assert list(output["x_categ"].astype(str)) == [
+        "(-0.001, 2.0]",
+        "(-0.001, 2.0]",
+        "(2.0, 4.0]",
+        "(2.0, 4.0]",
+    ]
+    assert output["y_categ"].nunique() == 2
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_intervals_written_as_text(csv_di, extension):
+    df = pd.DataFrame({"x": np.arange(6.0)})
+    df["categ"] = pd.cut(df["x"], bins=[0, 2, 5], include_lowest=True)
+    df["interval"] = pd.arrays.IntervalArray.from_breaks(np.arange(7.0))
+    df.loc[0, "interval"] = np.nan
+    path = "intervals" + extension
+
+    csv_di.write(df, path)
+    loaded = csv_di.load(path)
+    assert isinstance(loaded["categ"].dtype, pd.CategoricalDtype)
+    assert list(loaded["categ"]) == list(df["categ"].astype(str))
+    assert loaded["interval"].isna().tolist() == df["interval"].isna().tolist()
+    assert list(loaded["interval"].dropna()) == list(
+        df["interval"].dropna().astype(str)
+    )
+
+    csv_di.write_chunks([df.iloc[:3], df.iloc[3:]], "chunks" + extension)
+    chunked = csv_di.load("chunks" + extension)
+    assert list(chunked["categ"].astype(str)) == list(df["categ"].astype(str))
+
+
+def test_changed_file_evicts_previous_versions(csv_di, tmp_path):
+    path = "cached.csv"
+    pd.DataFrame({"x": [1, 2]}).to_csv(tmp_path / path, index=False)
+    csv_di.load(path)
+    csv_di.load(path, columns=["x"])
+    assert len(os.listdir(tmp_path / ".cache")) == 2
+
+    pd.DataFrame({"x": [1, 2, 3]}).to_csv(tmp_path / path, index=False)
+    assert len(csv_di.load(path)) == 3
+    assert len(os.listdir(tmp_path / ".cache")) == 1
+    assert len(csv_di.memory_cache._frames) == 1
+
+
+def test_disk_cache_is_bounded_by_default():
+    assert CSVDataInteractor().disk_cache.max_bytes is not None
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".feather"])
+def test_write_chunks_widens_the_schema(csv_di, extension):
+    chunks = [
+        pd.DataFrame({"k": [1, 2], "text": [np.nan, np.nan], "none": [None, None]}),
+        pd.DataFrame({"k": [3, 4], "text": [np.nan, np.nan], "none": [None, None]}),
+        pd.DataFrame({"k": [5.5, np.nan], "text": ["a", None], "none": [None, "b"]}),
+        pd.DataFrame({"k": [6, 7], "text": [np.nan, "c"], "none": [None, None]}),
+    ]
+    path = "widened" + extension
+
+    assert csv_di.write_chunks(iter(chunks), path) == 8
+    loaded = csv_di.load(path)
+    assert loaded["k"].tolist()[:5] == [1.0, 2.0, 3.0, 4.0, 5.5]
+    assert loaded["text"].dropna().tolist() == ["a", "c"]
+    assert loaded["text"].notna().tolist() == [False] * 4 + [True, False, False, True]
+    assert loaded["none"].dropna().tolist() == ["b"]
+
+
+def test_write_chunks_rejects_conflicting_types(csv_di):
+    chunks = [pd.DataFrame({"k": [1.5]}), pd.DataFrame({"k": ["a"]})]
+    with pytest.raises(pa.ArrowException):
+        csv_di.write_chunks(iter(chunks), "conflict.parquet")
+
+
+def test_read_columns_ignores_nrows_spec(csv_di, tmp_path):
+    pd.DataFrame({"a": [1], "b": [2]}).to_csv(tmp_path / "header.csv", index=False)
+    assert csv_di.read_columns("header.csv", {"nrows": 10}) == ["a", "b"]
+
+
+def test_params_are_read_only(write_params):
+    path = write_params("frozen", {"columns": ["a"], "meta": {"a": {"x": 1}}})
+    params = YAMLDataInteractor().load("frozen", path)
+
+    with pytest.raises(TypeError, match="read-only"):
+        params["columns"] = []
+    with pytest.raises(TypeError, match="read-only"):
+        params["columns"].append("b")
+    with pytest.raises(TypeError, match="read-only"):
+        params["meta"]["a"].update(y=2)
+    with pytest.raises(TypeError, match="read-only"):
+        params.setdefault("other", 1)
+
+    copy = thaw(params)
+    copy["meta"]["a"]["y"] = 2
+    assert params == {"columns": ["a"], "meta": {"a": {"x": 1}}}
+
+
+def test_params_are_reloaded_when_the_file_changes(write_params, data_path):
+    path = write_params("reloaded", {"value": 1})
+    registry = YAMLDataInteractor()
+    first = registry.load("reloaded", path)
+    assert registry.load("reloaded", path) is first
+
+    full_path = os.path.join(data_path, path)
+    mtime = os.stat(full_path).st_mtime_ns
+    write_params("reloaded", {"value": 2})
+    os.utime(full_path, ns=(mtime + 10**9, mtime + 10**9))
+    second = registry.load("reloaded", path)
+    assert second == {"value": 2}
+    assert registry.params["reloaded"] is second
+
+
+def test_encoder_keeps_dtypes_with_read_only_meta(write_params):
+    path = write_params("encoder", {"encoder_meta": {"n": {0: 10}, "s": {"a": "b"}}})
+    meta = YAMLDataInteractor().load("encoder", path)["encoder_meta"]
+    X = pd.DataFrame({"n": [0, 1, 2], "s": ["a", "c", None]})
+
+    result = Encoder(meta).transform(X)
+    assert result["n"].dtype == np.int64
+    assert result["n"].tolist() == [10, 1, 2]
+    assert result["s"].tolist()[:2] == ["b", "c"] and pd.isna(result["s"][2])
+    assert meta == {"n": {0: 10}, "s": {"a": "b"}}
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.interfaces import Folds, ModelInteractor
+
+
+@pytest.fixture
+def dataset():
+    rng = np.random.default_rng(0)
+    n = 600
+    X = pd.DataFrame(
+        {
+            "scale_id": np.repeat(np.arange(n // 6), 6),
+            "x": rng.normal(size=n),
+            "color": pd.Categorical(rng.choice(["red", "green", "blue"], size=n)),
+        },
+        index=np.arange(n) * 2,
+    )
+    y = pd.Series(2 * X["x"] + (X["color"] == "red") + rng.normal(0, 0.1, n))
+    indices = [np.arange(0, 200), np.arange(150, 400), np.r_[0:100, 500:600]]
+    return X, y, indices
+
+
+def test_folds_match_a_list_of_folds(dataset):
+    X, y, indices = dataset
+    folds = Folds(X, y, indices)
+    expected = [(X.iloc[idx], y.iloc[idx]) for idx in indices]
+
+    assert len(folds) == len(expected)
+    # contiguous positions are kept as slices
+    assert folds.indices[0] == slice(0, 200)
+    assert isinstance(folds.indices[2], np.ndarray)
+
+    def assert_folds_equal(result, expected):
+        assert len(result) == len(expected)
+        for (X_fold, y_fold), (X_expected, y_expected) in zip(result, expected):
+            pd.testing.assert_frame_equal(X_fold, X_expected)
+            pd.testing.assert_series_equal(y_fold, y_expected)
+
+    assert_folds_equal(list(folds), expected)
+    assert_folds_equal([folds[-1], folds[0]], [expected[-1], expected[0]])
+    assert_folds_equal(folds[1:], expected[1:])
+    assert_folds_equal(folds[::-2], expected[::-2])
+    with pytest.raises(IndexError):
+        folds[3]
+
+
+def test_parallel_fit_predict_matches_sequential(dataset, tmp_path, monkeypatch):
+    # catboost writes its training logs to the working directory
+    monkeypatch.chdir(tmp_path)
+    X, y, indices = dataset
+    trains = Folds(X, y, [np.setdiff1d(np.arange(len(X)), idx) for idx in indices])
+    tests = Folds(X, y, indices)
+
+    results = {}
+    for n_jobs in (1, 2):
+        interactor = ModelInteractor("catboost")
+        interactor.load_data(raw_data=X, trains=trains, tests=tests)
+        interactor.fit_predict({"depth": 2, "thread_count": 1}, n_jobs=n_jobs)
+        results[n_jobs] = interactor
+
+    for sequential, parallel in zip(results[1].predictions, results[2].predictions):
+        np.testing.assert_allclose(parallel, sequential)
+    # both paths leave self.model fitted on the last fold
+    np.testing.assert_allclose(
+        results[2].model.model.get_feature_importance(),
+        results[1].model.model.get_feature_importance(),
+    )
+    assert results[2].model.is_fitted_
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.metrics import MetricsAggregator, generate_metrics
+
+
+@pytest.mark.parametrize("metric", ["smape", "mape"])
+def test_aggregator_skips_nan_like_pandas(metric):
+    rng = np.random.default_rng(0)
+    y_true = pd.Series(rng.integers(0, 3, size=1_000).astype(float))
+    y_pred = pd.Series(rng.integers(0, 3, size=1_000).astype(float))
+    y_true[y_pred == 0] = 0.0
+
+    aggregator = MetricsAggregator(model_type="regression", metrics=[metric])
+    for start in range(0, len(y_true), 300):
+        aggregator.update(y_true[start : start + 300], y_pred[start : start + 300])
+    result = aggregator.result()[metric]
+
+    # the previous evaluate: np.mean/np.std over the per-row metrics Series
+    expected = generate_metrics(y_true, y_pred, "regression")[metric]
+    assert expected.isna().any()
+    assert result["avg"] == pytest.approx(np.mean(expected))
+    assert result["std"] == pytest.approx(np.std(expected))
+
+
+def test_aggregator_all_nan_batch():
+    aggregator = MetricsAggregator(model_type="regression", metrics=["smape"])
+    aggregator.update([0.0, 0.0], [0.0, 0.0]).update([1.0, 2.0], [1.0, 1.0])
+    assert aggregator.result()["smape"]["avg"] == pytest.approx(1 / 6)
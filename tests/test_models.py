@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.protocols import Model
+
+
+class LinearModel:
+    """Deterministic stand-in that also carries the prior prediction over."""
+
+    def predict(self, X):
+        preds = 2 * X["x"] + X["days_diff_event_to_scale_limited"]
+        if "prior_prediction" in X.columns:
+            preds = preds + 0.5 * X["prior_prediction"]
+        return preds.to_numpy()
+
+
+class FakeModel(Model):
+
+    model_type_ = "regression"
+    is_tunable_ = False
+
+    def __init__(self, prior_prediction):
+        super().__init__()
+        self.model = LinearModel()
+        self.is_fitted_ = True
+        self.prior_prediction_ = prior_prediction
+
+
+def old_predict_scale(model, X, scale_id):
+    X_ = X[X["scale_id"] == scale_id].copy()
+
+    preds = []
+    max_days_diff = X_["days_diff_event_to_scale_limited"].max()
+    scale_order = [
+        max_days_diff - i for i in X_["days_diff_event_to_scale_limited"].values
+    ]
+
+    if model.prior_prediction_:
+        for i in range(max_days_diff + 1):
+            aux = X_[
+                X_["days_diff_event_to_scale_limited"] == (max_days_diff - i)
+            ].copy()
+            aux["prior_prediction"] = preds[-1] if preds else 0
+            preds.append(model._predict(aux))
+    else:
+        return model._predict(X_)
+
+    return np.array(preds).flatten()[scale_order]
+
+
+def old_predict(model, X):
+    X_ = X.copy()
+    X_["prediction"] = 0.0
+    for scale_id in X_["scale_id"].unique():
+        mask = X_["scale_id"] == scale_id
+        X_.loc[mask, "prediction"] = old_predict_scale(model, X, scale_id)
+    return X_["prediction"].to_numpy()
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    # one row per day before the scale limit, up to a different horizon
+    # per scale id, in shuffled order
+    X = pd.DataFrame(
+        [
+            {"scale_id": scale_id, "days_diff_event_to_scale_limited": day}
+            for scale_id, horizon in enumerate([0, 3, 7, 7, 12])
+            for day in range(horizon + 1)
+        ]
+    )
+    X["x"] = rng.normal(size=len(X))
+    return X.sample(frac=1, random_state=0).set_index(
+        pd.Index(rng.permutation(len(X)) * 10)
+    )
+
+
+@pytest.mark.parametrize("prior_prediction", [False, True])
+def test_predict_matches_the_per_scale_loop(frame, prior_prediction):
+    model = FakeModel(prior_prediction)
+    np.testing.assert_allclose(model.predict(frame), old_predict(model, frame))
+
+
+def test_predict_empty_frame(frame):
+    assert len(FakeModel(True).predict(frame.iloc[:0])) == 0
@@ -0,0 +1,196 @@
+import os
+
+import pandas as pd
+import pytest
+
+from toolbelt_project.pipelines import DataCleaning, FeatureEngineering, execute_steps
+
+FEATURE_ENGINEERING_PARAMS = {
+    "dummies_columns": [],
+    "dummies_sparse": False,
+    "scale_meta": {},
+}
+
+
+@pytest.fixture
+def input_path(data_path):
+    path = "raw/pipelines.csv"
+    pd.DataFrame({"a": [1, 2], "b": [3, 4], "c": [5, 6]}).to_csv(
+        "{}/{}".format(data_path, path), index=False
+    )
+    return path
+
+
+def test_dropped_columns_are_pruned_at_load(write_params, input_path):
+    params_path = write_params(
+        "feature_engineering_pruned",
+        dict(FEATURE_ENGINEERING_PARAMS, selection_drop_columns=["b"]),
+    )
+    step = FeatureEngineering(params_path=params_path, input_path=input_path)
+    step.load()
+    assert list(step.data.columns) == ["a", "c"]
+    step.transform()
+    assert list(step.data.columns) == ["a", "c"]
+
+
+def test_dropping_a_missing_column_raises(write_params, input_path):
+    params_path = write_params(
+        "feature_engineering_missing",
+        dict(FEATURE_ENGINEERING_PARAMS, selection_drop_columns=["b", "typo"]),
+    )
+    step = FeatureEngineering(params_path=params_path, input_path=input_path)
+    step.load()
+    with pytest.raises(KeyError):
+        step.transform()
+
+
+CLEANING_PARAMS = {
+    "variable_columns": ["a", "b"],
+    "duplicate_columns": [],
+    "filter_notnull_columns": [],
+    "filter_custom_query_columns": [],
+    "filter_other_meta": {},
+}
+
+
+def test_execute_steps_reports_resolved_output_paths(write_params, input_path):
+    params_path = write_params("cleaning_report", CLEANING_PARAMS)
+
+    def steps():
+        return [
+            DataCleaning(
+                output_path="interim/report",
+                params_path=params_path,
+                input_path=input_path,
+            )
+        ]
+
+    key = "DataCleaning(interim/report.parquet)"
+    assert execute_steps(steps(), force="all") == {key: "executed"}
+    assert execute_steps(steps()) == {key: "skipped"}
+    assert execute_steps(steps(), force=[key]) == {key: "executed"}
+
+
+def test_streaming_cache_hit_leaves_the_output_on_disk(write_params, input_path):
+    params_path = write_params("cleaning_streaming", CLEANING_PARAMS)
+    step = DataCleaning(
+        output_path="interim/streaming.csv",
+        params_path=params_path,
+        input_path=input_path,
+    )
+    step.execute(force=True, cache=True)
+
+    step = DataCleaning(
+        output_path="interim/streaming.csv",
+        params_path=params_path,
+        input_path=input_path,
+    )
+    step.execute(chunksize=1, cache=True)
+    assert step.skipped
+    assert not hasattr(step, "data")
+    step.execute(cache=True)
+    assert list(step.data.columns) == ["a", "b"]
+
+
+@pytest.mark.parametrize("mode", [{}, {"chunksize": 2}, {"n_jobs": 1}])
+def test_execute_uses_fitted_transformers_without_fit(data_path, write_params, mode):
+    params_path = write_params(
+        "feature_engineering_fitted",
+        dict(
+            FEATURE_ENGINEERING_PARAMS,
+            selection_drop_columns=[],
+            scale_meta={"minmax": {"columns": ["a"], "params": {}}},
+        ),
+    )
+    pd.DataFrame({"a": [0.0, 2.0, 4.0, 5.0]}).to_csv(
+        "{}/raw/pipelines_fitted.csv".format(data_path), index=False
+    )
+
+    def step():
+        return FeatureEngineering(
+            output_path="interim/pipelines_fitted.csv",
+            params_path=params_path,
+            input_path="raw/pipelines_fitted.csv",
+        )
+
+    fitted = step()
+    fitted.data = pd.DataFrame({"a": [0.0, 10.0]})
+    fitted.fit()
+    # the cached output of a run with other fitted statistics is not reused
+    assert fitted.fingerprint(fit=False) != step().fingerprint(fit=False)
+    fitted.execute(fit=False, **mode)
+    output = fitted.di.csv.load(fitted.output_path, refresh=True)
+    assert output["a"].tolist() == [0.0, 0.2, 0.4, 0.5]
+
+    refitted = step()
+    refitted.scaler = fitted.scaler
+    refitted.transformers = [refitted.selector, refitted.dumminizer, fitted.scaler]
+    refitted.execute(**mode)
+    output = refitted.di.csv.load(refitted.output_path, refresh=True)
+    assert output["a"].tolist() == [0.0, 0.4, 0.8, 1.0]
+
+
+@pytest.mark.parametrize("reused", [False, True])
+def test_fitted_run_leaves_the_transformers_fitted(data_path, write_params, reused):
+    params_path = write_params(
+        "feature_engineering_refit",
+        dict(
+            FEATURE_ENGINEERING_PARAMS,
+            selection_drop_columns=[],
+            scale_meta={"minmax": {"columns": ["a"], "params": {}}},
+        ),
+    )
+    pd.DataFrame({"a": [0.0, 10.0]}).to_csv(
+        "{}/raw/pipelines_refit.csv".format(data_path), index=False
+    )
+
+    def step():
+        return FeatureEngineering(
+            output_path="interim/pipelines_refit.csv",
+            params_path=params_path,
+            input_path="raw/pipelines_refit.csv",
+        )
+
+    step().execute(force=True, cache=True)
+    fitted = step()
+    fitted.execute(force=not reused, cache=True)
+    assert fitted.skipped == reused
+
+    # applied with the statistics of the fitted run, not re-learned
+    fitted.input_data = pd.DataFrame({"a": [0.0, 5.0]})
+    fitted.execute(fit=False)
+    assert fitted.data["a"].tolist() == [0.0, 0.5]
+
+
+def test_artifacts_are_opt_in_and_bounded(data_path, write_params, input_path):
+    params_path = write_params("cleaning_artifacts", CLEANING_PARAMS)
+    artifacts = os.path.join(data_path, "interim", ".artifacts-bounded")
+
+    def step(**kwargs):
+        step = DataCleaning(
+            output_path="interim/artifacts.csv",
+            params_path=params_path,
+            input_data=pd.DataFrame(kwargs),
+        )
+        step.artifacts_dir = "interim/.artifacts-bounded"
+        return step
+
+    step(a=[1], b=[2]).execute()
+    assert not os.path.exists(artifacts)
+
+    for i in range(5):
+        last = step(a=[i] * 100, b=[i] * 100)
+        last.artifacts_max_bytes = 3_000
+        last.execute(cache=True)
+    assert (
+        0
+        < sum(
+            os.path.getsize(os.path.join(artifacts, name))
+            for name in os.listdir(artifacts)
+        )
+        <= 3_000
+    )
+    # the latest run is kept
+    last = step(a=[4] * 100, b=[4] * 100)
+    last.execute(cache=True)
+    assert last.skipped
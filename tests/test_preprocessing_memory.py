@@ -0,0 +1,73 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.pipelines import DataPreprocessing
+from toolbelt_project.schema import frame_memory
+
+N_ROWS = 200_000
+N_COLUMNS = 10
+
+
+@pytest.fixture
+def params_path(write_params):
+    columns = ["x{}".format(i) for i in range(N_COLUMNS)]
+    return write_params(
+        "preprocessing_memory",
+        {
+            "drop_columns": ["x0"],
+            "rename_meta": {"x1": "renamed"},
+            "bins_cut_meta": {},
+            "bins_qcut_meta": {},
+            "bins_other_meta": {},
+            "minimum_percentage_meta": {},
+            "binarizer_meta": {},
+            "encoder_meta": {"x2": {0.0: -1.0}},
+            "transformer_meta": {"add": {}},
+            "custom_transformer_name": "v0",
+            "default_numerical_missing_columns": columns[3:],
+            "default_categorical_missing_columns": [],
+            "other_missing_meta": {},
+            "default_fill_meta": {"numerical": 0, "categorical": "missing"},
+        },
+    )
+
+
+def make_frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(N_ROWS, N_COLUMNS))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return pd.DataFrame(values, columns=["x{}".format(i) for i in range(N_COLUMNS)])
+
+
+def transform_peak(params_path: str, inplace: bool) -> tuple:
+    step = DataPreprocessing(
+        params_path=params_path, input_data=make_frame(), inplace=inplace
+    )
+    step.load()
+    tracemalloc.start()
+    try:
+        step.transform()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, step.data
+
+
+def test_inplace_gives_the_same_output(params_path):
+    _, expected = transform_peak(params_path, inplace=False)
+    _, result = transform_peak(params_path, inplace=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_inplace_peak_memory(params_path):
+    frame_bytes = frame_memory(make_frame())
+    default_peak, _ = transform_peak(params_path, inplace=False)
+    inplace_peak, _ = transform_peak(params_path, inplace=True)
+
+    # a single copy of the loaded frame plus the filled columns, instead of
+    # a copy per transformer on top of the frame being transformed
+    assert inplace_peak < 2.5 * frame_bytes
+    assert inplace_peak < 0.7 * default_peak
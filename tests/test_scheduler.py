@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from toolbelt_project.pipelines import DataCleaning
+from toolbelt_project.scheduler import PipelineDAG
+
+CLEANING_PARAMS = {
+    "variable_columns": ["a"],
+    "duplicate_columns": [],
+    "filter_notnull_columns": [],
+    "filter_custom_query_columns": [],
+    "filter_other_meta": {},
+}
+
+
+@pytest.fixture
+def dag(data_path, write_params):
+    pd.DataFrame({"a": [1, 2], "b": [3, 4]}).to_csv(
+        "{}/raw/scheduler.csv".format(data_path), index=False
+    )
+    params_path = write_params("cleaning_scheduler", CLEANING_PARAMS)
+    return PipelineDAG.from_dict(
+        {
+            "clean": {
+                "step": DataCleaning(
+                    output_path="interim/scheduler_clean.csv",
+                    params_path=params_path,
+                    input_path="raw/scheduler.csv",
+                )
+            },
+            "clean_again": {
+                "step": DataCleaning(
+                    output_path="interim/scheduler_clean_again.csv",
+                    params_path=params_path,
+                    input_path="interim/scheduler_clean.csv",
+                ),
+                "depends_on": ["clean"],
+            },
+        },
+        memory_budget=1024**3,
+    )
+
+
+def test_run_keeps_memory_estimates_to_itself(dag):
+    report = dag.run(force="all")
+    assert {name: node["status"] for name, node in report.items()} == {
+        "clean": "executed",
+        "clean_again": "executed",
+    }
+    assert dag.memory == {"clean": None, "clean_again": None}
+
+    report = dag.run()
+    assert {node["status"] for node in report.values()} == {"skipped"}
+
+
+def test_run_rejects_cycles(dag):
+    dag.dependencies["clean"] = ["clean_again"]
+    with pytest.raises(ValueError):
+        dag.run()
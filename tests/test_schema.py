@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.data_interactor import CSVDataInteractor
+from toolbelt_project.schema import (
+    apply_schema,
+    infer_schema,
+    read_schema,
+    write_schema,
+)
+
+
+@pytest.fixture
+def csv_di(tmp_path):
+    return CSVDataInteractor(base_path=str(tmp_path), disk_cache_dir=None)
+
+
+def test_infer_schema():
+    df = pd.DataFrame(
+        {
+            "small": [1, 2, 3, 4],
+            "big": [1, 2, 3, 2**40],
+            "half": [0.5, 1.5, np.nan, 2.0],
+            "tenth": [0.1, 0.2, 0.3, 0.4],
+            "city": ["a", "b", "a", "a"],
+        }
+    )
+    assert infer_schema(df) == {
+        "small": "int8",
+        "big": None,
+        "half": "float32",
+        "tenth": None,
+        "city": "category",
+    }
+
+
+def test_apply_schema_skips_lossy_casts():
+    df = pd.DataFrame({"k": [1, 100_000], "x": [0.1, 0.5], "y": [0.5, 1.5]})
+    skipped = apply_schema(df, {"k": "int8", "x": "float32", "y": "float32"})
+    assert skipped == ["k", "x"]
+    assert df["k"].tolist() == [1, 100_000]
+    assert df["x"].tolist() == [0.1, 0.5]
+    assert df["y"].dtype == "float32"
+
+
+def test_schema_inferred_on_some_rows_is_not_saved(csv_di, tmp_path):
+    values = pd.DataFrame(
+        {"k": [1] * 10 + [100_000], "x": [0.5] * 10 + [0.1], "city": ["a"] * 11}
+    )
+    values.to_csv(tmp_path / "data.csv", index=False)
+
+    head = csv_di.load("data.csv", {"nrows": 10}, compact=True)
+    assert head["k"].dtype == "int8"
+    assert read_schema(str(tmp_path / "data.csv")) == {}
+
+    full = csv_di.load("data.csv", compact=True)
+    assert full["k"].tolist() == values["k"].tolist()
+    assert full["x"].tolist() == values["x"].tolist()
+    assert read_schema(str(tmp_path / "data.csv"))["k"] == "int32"
+
+
+def test_saved_schema_is_widened_to_fit_the_rows(csv_di, tmp_path):
+    values = pd.DataFrame({"k": [1, 2, 100_000], "x": [0.5, 1.5, 0.1]})
+    values.to_csv(tmp_path / "data.csv", index=False)
+    path = str(tmp_path / "data.csv")
+    # e.g. saved from a subset of the rows
+    write_schema(path, {"k": "int8", "x": "float32"})
+
+    full = csv_di.load("data.csv", compact=True)
+    assert full["k"].tolist() == values["k"].tolist()
+    assert full["x"].tolist() == values["x"].tolist()
+    assert read_schema(path) == {"k": "int32", "x": None}
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.splitters import WindowedWeeklySplitter
+
+
+def old_split(dataset, date_week_col, past_periods, future_periods, max_splits):
+    df = dataset.copy()
+    df[date_week_col] = pd.to_datetime(df[date_week_col]).dt.date
+
+    splits = []
+    for i in range(max_splits):
+        df_aux = df[
+            df[date_week_col]
+            <= (df[date_week_col].max() - pd.DateOffset(weeks=i)).date()
+        ]
+        ref_max_date = (
+            df_aux[date_week_col]
+            .sort_values(ascending=False)
+            .drop_duplicates()
+            .iloc[future_periods - 1]
+        )
+        ref_min_date = (ref_max_date - pd.DateOffset(weeks=past_periods)).date()
+        train_idx = df_aux[
+            (df_aux[date_week_col] >= ref_min_date)
+            & (df_aux[date_week_col] < ref_max_date)
+        ].index
+        test_idx = df_aux[df_aux[date_week_col] >= ref_max_date].index
+        splits.append((train_idx, test_idx))
+    return splits
+
+
+def weekly_frame(n_rows: int, n_weeks: int, shuffle: bool, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    weeks = pd.date_range("2021-01-04", periods=n_weeks, freq="W-MON")
+    dates = np.sort(rng.integers(0, n_weeks, n_rows))
+    if shuffle:
+        rng.shuffle(dates)
+    return pd.DataFrame({"week": weeks[dates].strftime("%Y-%m-%d"), "y": dates})
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize(
+    "past_periods, future_periods, max_splits", [(4, 1, 5), (8, 3, 10)]
+)
+def test_split_matches_previous_implementation(
+    shuffle, past_periods, future_periods, max_splits
+):
+    X = weekly_frame(2_000, 40, shuffle)
+    splitter = WindowedWeeklySplitter("week", past_periods, future_periods, max_splits)
+
+    expected = old_split(X, "week", past_periods, future_periods, max_splits)
+    result = splitter.split(X)
+
+    assert len(result) == len(expected)
+    for (train, test), (old_train, old_test) in zip(result, expected):
+        # positions and labels coincide on a RangeIndex
+        np.testing.assert_array_equal(train, old_train.to_numpy())
+        np.testing.assert_array_equal(test, old_test.to_numpy())
+
+
+def test_split_with_too_few_weeks():
+    splitter = WindowedWeeklySplitter("week", 4, 3, 5)
+    with pytest.raises(ValueError):
+        splitter.split(weekly_frame(100, 5, shuffle=False))
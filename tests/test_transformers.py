@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from toolbelt_project.transformers import Binner, Cleaner, Scaler
+
+
+@pytest.mark.parametrize("q", [4, 10, [0, 0.1, 0.5, 0.9, 1]])
+def test_binner_partial_fit_matches_qcut(q):
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"x": np.round(rng.exponential(size=10_000), 2)})
+    X.loc[::17, "x"] = np.nan
+
+    binner = Binner(bins_cut_meta={}, bins_qcut_meta={"x": q}, bins_other_meta={})
+    for start in range(0, len(X), 700):
+        binner.partial_fit(X.iloc[start : start + 700])
+    # only the distinct values are held between chunks
+    held = sum(len(values) for values, _ in binner._qcut_counts["x"])
+    assert held <= 2 * X["x"].nunique()
+
+    result = binner.transform(X)["x_categ"]
+    expected = pd.qcut(X["x"], q=q, precision=1)
+    assert result.astype(str).equals(expected.astype(str))
+
+
+@pytest.mark.parametrize(
+    "second",
+    [
+        [1.0, np.nan],
+        pd.array([True, None], dtype="boolean"),
+        pd.array([1, None], dtype="Int64"),
+    ],
+)
+def test_cleaner_streaming_matches_numbers_across_dtypes(second):
+    cleaner = Cleaner(variable_columns=["k"], duplicate_columns=["k"])
+    cleaner.start_stream()
+    first = cleaner.transform_chunk(pd.DataFrame({"k": [1, 2, 2**60]}))
+    second = cleaner.transform_chunk(pd.DataFrame({"k": second}))
+    assert first["k"].tolist() == [1, 2, 2**60]
+    # 1 was already seen, only the missing value is new
+    assert len(second) == 1 and second["k"].isna().all()
+
+
+def test_scaler_rejects_shifting_sparse_columns():
+    X = pd.DataFrame({"d": pd.arrays.SparseArray([0.0, 1.0, 0.0, 0.0], fill_value=0.0)})
+
+    minmax = Scaler(scale_meta={"minmax": {"columns": ["d"], "params": {}}})
+    result = minmax.transform(X)
+    assert isinstance(result["d"].dtype, pd.SparseDtype)
+    assert result["d"].sparse.fill_value == 0
+
+    standard = Scaler(scale_meta={"standard": {"columns": ["d"], "params": {}}})
+    with pytest.raises(ValueError, match="sparse"):
+        standard.transform(X)
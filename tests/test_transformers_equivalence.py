@@ -0,0 +1,460 @@
+"""Vectorized transformers against the row-wise implementations they replaced."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from unidecode import unidecode
+
+from toolbelt_project.helper_functions import normalize_texts
+from toolbelt_project.transformers import (
+    Binarizer,
+    Binner,
+    Cleaner,
+    Encoder,
+    FeatureTransformer,
+    Filter,
+    MinimumPercentageFilter,
+    MissingInputer,
+    Scaler,
+)
+
+
+def old_cleaner(X, variable_columns, duplicate_columns):
+    X = X.copy()[variable_columns]
+    X = X.replace(r"^\s*$", np.nan, regex=True)
+    X = X.map(lambda x: x.strip() if isinstance(x, str) else x)
+    if duplicate_columns:
+        X = X.drop_duplicates(subset=duplicate_columns)
+    return X.reset_index(drop=True)
+
+
+def old_filter(X, notnull_columns, custom_queries, other_meta):
+    X = X.copy()
+    if notnull_columns:
+        X = X.loc[pd.notnull(X[notnull_columns]).all(axis=1), :]
+    if other_meta:
+        X = X.loc[(X[list(other_meta)] == pd.Series(other_meta)).all(axis=1)]
+    for query in custom_queries:
+        X = X.query(query)
+    return X.reset_index(drop=True)
+
+
+def old_minimum_percentage_filter(X, minimum_percentage_meta):
+    X = X.copy()
+    for col in minimum_percentage_meta.keys():
+        aux = (X[col].value_counts().index)[
+            (
+                X[col].value_counts()
+                > (minimum_percentage_meta[col] * pd.notnull(X[col]).sum())
+            )
+        ]
+        X[col] = X[col].apply(lambda x: x if x in aux else "other")
+    return X
+
+
+def old_binarizer(X, binarizer_meta):
+    X = X.copy()
+    for column, element in binarizer_meta.items():
+        X["{}_is_{}".format(column, element)] = X[column].apply(
+            lambda x: 1 if x == element else 0
+        )
+    return X
+
+
+def old_date_to_month(X, feature_name, columns):
+    X = X.copy()
+    X[feature_name] = pd.to_datetime(X[columns[0]], errors="coerce").apply(
+        lambda x: x.replace(day=1) if pd.notnull(x) else x
+    )
+    return X
+
+
+def old_fix_zipcodes(X, feature_name, columns):
+    X = X.copy()
+    for column in columns:
+        X[column] = X[column].apply(lambda x: x.replace(" ", "").replace("-", ""))
+    return X
+
+
+def old_normalize_text(x):
+    if not pd.notnull(x):
+        return x
+    return "_".join(
+        unidecode(
+            x.lower()
+            .strip()
+            .replace("%", "pct")
+            .replace("-", "")
+            .replace("/", "")
+            .replace(".", "")
+        ).split()
+    )
+
+
+def old_fix_texts(X, feature_name, columns):
+    X = X.copy()
+    if len(columns) == 1:
+        X[feature_name] = X[columns[0]].apply(old_normalize_text)
+        return X
+    for column in columns:
+        X[column] = X[column].apply(old_normalize_text)
+    return X
+
+
+def old_inequality_flag(X, feature_name, columns, threshold):
+    X = X.copy()
+    X[feature_name] = X[columns[0]].apply(lambda x: 1 if x < threshold else 0)
+    return X
+
+
+def old_scaler(X, scale_meta):
+    # the old transform also re-applied a *_multiple_columns scaler column by
+    # column right after it, which was dropped on purpose
+    X = X.copy()
+
+    def minmax(X, v_min=0, v_max=1):
+        return (X - X.min()) / (X.max() - X.min()) * (v_max - v_min) + v_min
+
+    def standard(X):
+        return (X - X.mean()) / X.std()
+
+    def minmax_multiple_columns(X, v_min=0, v_max=1):
+        return (X - X.min().min()) / (X.max().max() - X.min().min()) * (
+            v_max - v_min
+        ) + v_min
+
+    scalers = {
+        "minmax": minmax,
+        "standard": standard,
+        "minmax_multiple_columns": minmax_multiple_columns,
+    }
+    for scaler_name, meta in scale_meta.items():
+        scaler = scalers[scaler_name]
+        if "_multiple_columns" in scaler_name:
+            X[meta["columns"]] = scaler(X[meta["columns"]], **meta["params"])
+        else:
+            for col in meta["columns"]:
+                X[col] = scaler(X[col], **meta["params"])
+    return X
+
+
+def old_binner(X, bins_cut_meta, bins_qcut_meta, bins_other_meta):
+    X = X.copy()
+    for column, bins in bins_cut_meta.items():
+        X[column + "_categ"] = pd.cut(X[column], bins=bins, include_lowest=True)
+    for column, q in bins_qcut_meta.items():
+        X[column + "_categ"] = pd.qcut(X[column], q=q, precision=1)
+    for var, meta in bins_other_meta.items():
+        X[meta["var_name"]] = pd.cut(
+            X[var], bins=meta["bins"], labels=meta["bins_labels"], include_lowest=True
+        )
+    return X
+
+
+def old_encoder(X, encoder_meta):
+    X = X.copy()
+    for var, meta in encoder_meta.items():
+        meta = dict(meta)
+        for unique_elem in X[var].unique().tolist():
+            if unique_elem not in meta.keys():
+                meta[unique_elem] = unique_elem
+        X[var] = X[var].map(meta)
+    return X
+
+
+def old_missing_inputer(X, numerical, categorical, other_meta, fill_meta):
+    X = X.copy()
+    if numerical:
+        X[numerical] = X[numerical].fillna(fill_meta["numerical"])
+    for column in categorical:
+        if isinstance(X[column].dtype, pd.CategoricalDtype):
+            X[column] = (
+                X[column]
+                .cat.add_categories([fill_meta["categorical"]])
+                .fillna(fill_meta["categorical"])
+            )
+        else:
+            X[column] = X[column].fillna(fill_meta["categorical"])
+    for var, meta in other_meta.items():
+        if isinstance(X[var].dtype, pd.CategoricalDtype):
+            X[var] = X[var].cat.add_categories([meta]).fillna(meta)
+        else:
+            X[var] = X[var].fillna(meta)
+    return X
+
+
+def fit_then_transform(transformer, fit_on, batches):
+    """Fit on one frame, then transform each batch on its own."""
+    transformer.fit(fit_on)
+    return pd.concat(
+        [transformer.transform(batch) for batch in batches], ignore_index=True
+    )
+
+
+def batches(X, size=70):
+    return [X.iloc[start : start + size] for start in range(0, len(X), size)]
+
+
+def feature_transformer(name, feature_name, columns, **params):
+    return FeatureTransformer(
+        transformer_meta={
+            name: {
+                "0": {
+                    "feature_name": feature_name,
+                    "columns": columns,
+                    "params": params,
+                }
+            }
+        }
+    )
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 500
+    names = np.array([" ana", "ana ", "bob", "  ", "", "carl", None], dtype=object)
+    mixed = np.array([" a ", 1, 2.5, None, "b", " "], dtype=object)
+    return pd.DataFrame(
+        {
+            "name": names[rng.integers(0, len(names), n)],
+            "mixed": mixed[rng.integers(0, len(mixed), n)],
+            "number": rng.integers(0, 5, n),
+            "ratio": np.where(rng.random(n) < 0.1, np.nan, rng.random(n)),
+            "city": pd.Categorical(
+                np.array([" rio", "sp ", "bh"])[rng.integers(0, 3, n)]
+            ),
+            # " x" and "x " become the same category once stripped
+            "merged": pd.Categorical(
+                np.array([" x", "x ", "y", " "])[rng.integers(0, 4, n)]
+            ),
+            "zipcode": np.array(["01 234-5", "98765-000", "1 2 3"])[
+                rng.integers(0, 3, n)
+            ].astype(object),
+            "date": pd.Series(
+                pd.date_range("2023-01-01 10:30", periods=n, freq="17h")
+            ).where(rng.random(n) > 0.1),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "variable_columns, duplicate_columns",
+    [
+        (["name", "mixed", "number", "ratio"], []),
+        (["name", "number"], ["name"]),
+        (["city", "merged", "number"], []),
+        (["city", "merged", "number"], ["city", "merged"]),
+    ],
+)
+def test_cleaner(frame, variable_columns, duplicate_columns):
+    expected = old_cleaner(frame, variable_columns, duplicate_columns)
+    result = Cleaner(variable_columns, duplicate_columns).transform(frame)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_cleaner_strips_categories(frame):
+    result = Cleaner(["city", "merged"], []).transform(frame)
+    assert isinstance(result["city"].dtype, pd.CategoricalDtype)
+    assert set(result["city"].cat.categories) == {"bh", "rio", "sp"}
+    assert set(result["merged"].dropna()) == {"x", "y"}
+
+
+@pytest.mark.parametrize("column", ["name", "number", "city"])
+def test_minimum_percentage_filter(frame, column):
+    meta = {column: 0.2}
+    expected = old_minimum_percentage_filter(frame, meta)
+    result = MinimumPercentageFilter(meta).transform(frame)
+    # categorical columns used to stay categorical only while no two
+    # categories were replaced by "other"; they now always come back as object
+    pd.testing.assert_frame_equal(result.astype(object), expected.astype(object))
+
+
+def test_binarizer(frame):
+    X = frame.assign(flag=np.where(frame["number"] > 2, "yes", "no"))
+    expected = old_binarizer(X, {"flag": "yes"})
+    pd.testing.assert_frame_equal(Binarizer({"flag": "yes"}).transform(X), expected)
+
+
+def test_date_to_month(frame):
+    expected = old_date_to_month(frame, "month", ["date"])
+    result = feature_transformer("date_to_month", "month", ["date"]).transform(frame)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_fix_zipcodes(frame):
+    expected = old_fix_zipcodes(frame, "zipcode", ["zipcode"])
+    result = feature_transformer("fix_zipcodes", "zipcode", ["zipcode"]).transform(
+        frame
+    )
+    pd.testing.assert_frame_equal(result, expected)
+
+
+TEXTS = [
+    "São Paulo",
+    "SÃO  PAULO ",
+    "são-paulo",
+    " Crème Brûlée ",
+    "50% off/now",
+    "U.S.A.",
+    "Ελλάδα",
+    "北京",
+    "tab\tand\u00a0nbsp",
+    "",
+    "   ",
+    None,
+    np.nan,
+]
+
+
+@pytest.mark.parametrize("dtype", [object, "str"])
+def test_normalize_texts(dtype):
+    values = pd.Series(
+        TEXTS * 3, index=np.arange(len(TEXTS) * 3) * 2, name="t", dtype=dtype
+    )
+    expected = values.astype(object).apply(old_normalize_text)
+    result = normalize_texts(values)
+    pd.testing.assert_series_equal(result, expected)
+    # None and NaN stay missing, every other value becomes a string
+    pd.testing.assert_series_equal(result.isna(), values.isna())
+
+
+@pytest.mark.parametrize(
+    "feature_name, columns", [("name_fixed", ["name"]), ("", ["name", "mixed"])]
+)
+def test_fix_texts(frame, feature_name, columns):
+    X = frame.assign(
+        mixed=np.array(TEXTS, dtype=object)[np.arange(len(frame)) % len(TEXTS)]
+    )
+    expected = old_fix_texts(X, feature_name, columns)
+    result = feature_transformer("fix_texts", feature_name, columns).transform(X)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_inequality_flag(frame):
+    expected = old_inequality_flag(frame, "low", ["number"], threshold=2)
+    result = feature_transformer(
+        "inequality_flag", "low", ["number"], threshold=2
+    ).transform(frame)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("dtype", ["Int64", "int64[pyarrow]", "float64"])
+@pytest.mark.parametrize(
+    "notnull_columns, custom_queries, other_meta",
+    [
+        (["c"], ["c > 3"], {}),
+        (["c", "name"], ["c > 1", "number < 4"], {"number": 2}),
+        ([], ["number > 1"], {"number": 3}),
+    ],
+)
+def test_filter(frame, dtype, notnull_columns, custom_queries, other_meta):
+    frame["c"] = pd.Series(
+        np.where(np.arange(len(frame)) % 7 == 0, None, np.arange(len(frame)) % 6),
+        dtype="Float64",
+    ).astype(dtype)
+
+    expected = old_filter(frame, notnull_columns, custom_queries, other_meta)
+    result = Filter(notnull_columns, custom_queries, other_meta).transform(frame)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_filter_selectivity():
+    X = pd.DataFrame(
+        {
+            "a": pd.array([1, None, 3, 4], dtype="Int64"),
+            "b": ["x", "y", "x", "x"],
+        }
+    )
+    filter_ = Filter(["a"], ["a > 2"], {"b": "x"})
+    result = filter_.transform(X)
+
+    assert result["a"].tolist() == [3, 4]
+    # each condition's share is measured on every row, on its own
+    assert filter_.selectivity_ == {
+        "notnull(a)": 0.75,
+        "b == 'x'": 0.75,
+        "a > 2": 0.5,
+    }
+
+    filter_.transform(X.iloc[:0])
+    assert set(filter_.selectivity_.values()) == {1.0}
+
+
+SCALE_META = {
+    "minmax": {"columns": ["ratio"], "params": {"v_min": -1, "v_max": 3}},
+    "standard": {"columns": ["number"], "params": {}},
+    "minmax_multiple_columns": {
+        "columns": ["low", "high"],
+        "params": {"v_min": 0, "v_max": 3},
+    },
+}
+
+
+@pytest.fixture
+def numbers(frame):
+    rng = np.random.default_rng(1)
+    return frame[["number", "ratio"]].assign(
+        low=rng.normal(size=len(frame)), high=rng.normal(3, size=len(frame))
+    )
+
+
+def test_scaler_fit_then_transform(numbers):
+    expected = old_scaler(numbers, SCALE_META)
+    result = fit_then_transform(Scaler(SCALE_META), numbers, batches(numbers))
+
+    # minmax applies the very same operations, the maximum is exactly v_max
+    minmax = ["ratio", "low", "high"]
+    pd.testing.assert_frame_equal(result[minmax], expected[minmax], check_exact=True)
+    assert result["ratio"].max() == 3
+    # the std comes from merged moments, equal up to rounding
+    pd.testing.assert_series_equal(result["number"], expected["number"], rtol=1e-12)
+
+
+def test_scaler_partial_fit_over_batches(numbers):
+    expected = old_scaler(numbers, SCALE_META)
+    scaler = Scaler(SCALE_META)
+    for batch in batches(numbers, size=45):
+        scaler.partial_fit(batch)
+    result = pd.concat(
+        [scaler.transform(batch) for batch in batches(numbers)], ignore_index=True
+    )
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-12)
+
+
+def test_binner_fit_then_transform(frame):
+    meta = dict(
+        bins_cut_meta={"number": [0, 2, 4]},
+        bins_qcut_meta={"ratio": 4},
+        bins_other_meta={
+            "number": {"var_name": "size", "bins": [0, 1, 5], "bins_labels": ["s", "l"]}
+        },
+    )
+    expected = old_binner(frame, **meta)
+    result = fit_then_transform(Binner(**meta), frame, batches(frame))
+    # batches hold some of the bins only, so the categories are compared
+    # as values
+    pd.testing.assert_frame_equal(
+        result.astype({"number_categ": str, "ratio_categ": str, "size": str}),
+        expected.astype({"number_categ": str, "ratio_categ": str, "size": str}),
+    )
+
+
+def test_encoder_fit_then_transform(frame):
+    meta = {"name": {"bob": "robert", "carl": "carlos"}, "number": {0: 10, 4: 40}}
+    expected = old_encoder(frame, meta)
+    result = fit_then_transform(Encoder(meta), frame.iloc[:50], batches(frame))
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_missing_inputer_fit_then_transform(frame):
+    X = frame.assign(city=frame["city"].where(frame["number"] > 0))
+    args = (
+        ["ratio"],
+        ["name", "city"],
+        {"mixed": "unknown"},
+        {"numerical": -1, "categorical": "missing"},
+    )
+    expected = old_missing_inputer(X, *args)
+    result = fit_then_transform(MissingInputer(*args), X.iloc[:50], batches(X))
+    pd.testing.assert_frame_equal(result, expected)